@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.models.chat import ChatRequest, ChatResponse
 from app.services.chat_service import chat_service
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,3 +25,34 @@ async def chat(request: ChatRequest):
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Stream a RAG response as server-sent events
+
+    Emits a ``sources`` event first, then ``token`` events as the LLM
+    generates them, then ``done``. Errors are sent as an ``error`` event.
+    Generation stops as soon as the client disconnects.
+    """
+    history = [h.model_dump() for h in request.history] if request.history else []
+
+    async def event_stream():
+        events = chat_service.chat_stream(query=request.query, conversation_history=history)
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling chat stream")
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
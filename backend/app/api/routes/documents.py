@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from app.models.document import DocumentListResponse, DeleteResponse
-from app.services.qdrant_service import qdrant_service
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal, Optional
+from app.models.document import DocumentListResponse, DeleteResponse, BulkDeleteRequest, BulkDeleteResponse
+from app.storage.document_store import document_store
+from app.services.ingestion_service import ingestion_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,11 +11,31 @@ router = APIRouter()
 
 
 @router.get("/documents", response_model=DocumentListResponse)
-async def get_documents():
-    """Get all documents in the knowledge base"""
+async def get_documents(
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort_by: Literal["timestamp", "title", "chunk_count"] = "timestamp",
+    order: Literal["asc", "desc"] = "desc",
+    source: Optional[str] = None,
+    search: Optional[str] = Query(None, description="Substring match on title or URL"),
+):
+    """List documents in the knowledge base from the document catalog"""
     try:
-        documents = await qdrant_service.get_all_documents()
-        return DocumentListResponse(documents=documents)
+        documents, next_cursor, total = await document_store.alist_documents(
+            limit=limit,
+            cursor=cursor,
+            sort_by=sort_by,
+            order=order,
+            source=source,
+            search=search,
+        )
+        return DocumentListResponse(
+            documents=[{**doc, "id": doc["document_id"]} for doc in documents],
+            next_cursor=next_cursor,
+            total=total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -23,8 +45,28 @@ async def get_documents():
 async def delete_document(document_id: str):
     """Delete a document and all its chunks from the knowledge base"""
     try:
-        deleted_count = await qdrant_service.delete_document(document_id)
+        deleted_count = await ingestion_service.delete_document(document_id)
         return DeleteResponse(status="success", deleted_count=deleted_count)
     except Exception as e:
         logger.error(f"Error deleting document: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/documents/bulk-delete", response_model=BulkDeleteResponse)
+async def bulk_delete_documents(request: BulkDeleteRequest):
+    """Delete documents by ID list, source and/or ingestion cutoff in one pass"""
+    if not (request.document_ids or request.source or request.older_than):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide at least one of 'document_ids', 'source' or 'older_than'",
+        )
+    try:
+        result = await ingestion_service.delete_documents(
+            document_ids=request.document_ids,
+            source=request.source,
+            older_than=request.older_than,
+        )
+        return BulkDeleteResponse(status="success", **result)
+    except Exception as e:
+        logger.error(f"Error bulk deleting documents: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from app.services.qdrant_service import qdrant_service
+from app.services.embedding_service import embedding_service
+from app.services.answer_cache import answer_cache
 
 router = APIRouter()
 
@@ -9,13 +11,15 @@ async def health_check():
     """Health check endpoint"""
     try:
         client = qdrant_service._get_client()
-        collections = client.get_collections()
+        collections = await client.get_collections()
         qdrant_connected = collections is not None
 
         return {
             "status": "healthy",
             "qdrant_connected": qdrant_connected,
             "collection_name": qdrant_service.collection_name,
+            "embedding_cache": await embedding_service.acache_stats(),
+            "answer_cache": answer_cache.stats(),
         }
     except Exception as e:
         return {
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from app.models.ingestion import IngestRequest, IngestResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from app.core.chunking import CHUNKERS
+from app.core.config import settings
+from app.core.uploads import FORM_FIELD_MAX_BYTES, MultipartUpload, UploadError
+from app.models.ingestion import BulkIngestRequest, IngestRequest
+from app.models.job import BatchUploadResponse, JobResponse, RejectedUpload
 from app.services.ingestion_service import ingestion_service
+from app.services.job_queue import job_queue
 import logging
-import tempfile
 import os
 import json
 
@@ -11,48 +17,136 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Supported file extensions
-SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt', '.md', '.png', '.jpg', '.jpeg', '.webp', '.gif'}
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt', '.md', '.html', '.htm', '.png', '.jpg', '.jpeg', '.webp', '.gif'}
 
 
-@router.post("/ingest", response_model=IngestResponse)
+@router.post("/ingest", response_model=JobResponse, status_code=202)
 async def ingest_content(request: IngestRequest):
-    """Ingest content from URL, file, or direct text"""
+    """Queue ingestion of a URL or direct text; poll /jobs/{job_id} for the result"""
+    payload = {"metadata": request.metadata or {}, "chunking": request.chunking}
+    if request.url:
+        kind, payload["url"] = "url", request.url
+    elif request.text:
+        kind, payload["text"] = "text", request.text
+    else:
+        raise HTTPException(status_code=400, detail="Either 'url' or 'text' must be provided")
+
     try:
-        if request.url:
-            result = await ingestion_service.ingest_url(request.url, request.metadata or {})
-        elif request.text:
-            result = await ingestion_service.ingest_text(request.text, request.metadata or {})
-        else:
-            raise HTTPException(status_code=400, detail="Either 'url' or 'text' must be provided")
-
-        return IngestResponse(**result)
+        job = await job_queue.submit(kind, payload)
     except Exception as e:
         logger.error(f"Ingestion error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    return JobResponse(**job)
 
 
-@router.post("/upload", response_model=IngestResponse)
-async def upload_file(
-    file: UploadFile = File(...),
-    metadata: str = Form(default="{}")
-):
-    """Upload and ingest a file (PDF, DOCX, TXT, MD, PNG, JPG, JPEG, WEBP, GIF)"""
-    # Validate file extension
-    filename = file.filename or "unknown"
-    ext = os.path.splitext(filename)[1].lower()
+@router.post("/ingest/bulk")
+async def ingest_bulk(request: BulkIngestRequest, http_request: Request):
+    """Ingest many URLs or a sitemap, streaming per-URL results as server-sent events
+
+    Emits ``queued`` with the number of URLs, a ``result`` event per URL as
+    it completes, then ``done`` with totals. Disconnecting stops the crawl.
+    """
+    if not request.urls and not request.sitemap:
+        raise HTTPException(status_code=400, detail="Either 'urls' or 'sitemap' must be provided")
+
+    async def event_stream():
+        events = ingestion_service.ingest_urls(
+            urls=request.urls,
+            sitemap=request.sitemap,
+            metadata=request.metadata,
+            chunking=request.chunking,
+            respect_robots=request.respect_robots,
+        )
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, stopping bulk ingestion")
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Bulk ingestion error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _upload_form(file_field: str, many: bool) -> Dict[str, Any]:
+    """OpenAPI request body of an upload route, which reads the multipart body itself"""
+    file_schema = {"type": "string", "format": "binary"}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "required": [file_field],
+        "properties": {
+            file_field: {"type": "array", "items": file_schema} if many else file_schema,
+            "metadata": {"type": "string", "default": "{}"},
+            **({"file_metadata": {"type": "string", "default": "[]"}} if many else {}),
+            "chunking": {"type": "string", "enum": list(CHUNKERS)},
+        },
+    }}}}}
+
+
+async def _receive_upload(request: Request, file_field: str, max_files: int) -> MultipartUpload:
+    """Stream a multipart upload straight into the job upload directory
+
+    A declared Content-Length over what the request may carry is refused
+    before the body is read; otherwise files are hashed and written once,
+    in UPLOAD_CHUNK_BYTES blocks, as the body arrives. A single-file upload
+    stops reading as soon as its file is rejected; a batch records the
+    rejection on the file and reads on.
+    """
+    limit = settings.UPLOAD_MAX_BYTES * max_files + FORM_FIELD_MAX_BYTES
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.UPLOAD_MAX_BYTES} bytes"
+        )
+    try:
+        upload = MultipartUpload(
+            request.headers.get("content-type", ""),
+            upload_dir=settings.JOB_UPLOAD_DIR,
+            file_field=file_field,
+            extensions=SUPPORTED_EXTENSIONS,
+            max_file_bytes=settings.UPLOAD_MAX_BYTES,
+            max_files=max_files,
+            block_bytes=settings.UPLOAD_CHUNK_BYTES,
+            skip_rejected=max_files > 1,
+        )
+        await upload.read(request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if not upload.files:
+        raise HTTPException(status_code=400, detail=f"No file uploaded in the '{file_field}' field")
+    return upload
+
 
-    if ext not in SUPPORTED_EXTENSIONS:
+def _parse_upload_options(metadata: Optional[str], chunking: Optional[str]) -> Dict[str, Any]:
+    """Validate the chunking strategy and parse the metadata form field"""
+    if chunking and chunking not in CHUNKERS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type: {ext}. Supported: {', '.join(SUPPORTED_EXTENSIONS)}"
+            detail=f"Unknown chunking strategy: {chunking}. Supported: {', '.join(CHUNKERS)}"
         )
 
     # Parse metadata JSON
     try:
-        meta_dict = json.loads(metadata) if metadata else {}
+        return json.loads(metadata) if metadata else {}
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid metadata JSON")
 
+
+async def _queue_upload(upload: Dict[str, Any], metadata: Dict[str, Any], chunking: Optional[str]) -> Dict[str, Any]:
+    """Queue the ingestion job of one stored upload; the job queue deletes the file afterwards"""
+    filename = upload["filename"]
+    ext = os.path.splitext(filename)[1].lower()
+
+    meta_dict = dict(metadata)
     # Add filename to metadata
     meta_dict["filename"] = filename
     meta_dict["file_type"] = ext[1:]  # Remove the dot
@@ -60,25 +154,82 @@ async def upload_file(
     title = os.path.splitext(filename)[0]
     meta_dict["title"] = title
 
-    # Save to temp file and process
-    tmp_path = None
     try:
-        # Create temp file with correct extension
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-
-        logger.info(f"Processing uploaded file: {filename}")
-
-        # Process using existing ingestion service
-        result = await ingestion_service.ingest_file(tmp_path, meta_dict)
-
-        return IngestResponse(**result)
+        job = await job_queue.submit(
+            "file", {"path": upload["path"], "sha256": upload["sha256"], "metadata": meta_dict, "chunking": chunking}
+        )
     except Exception as e:
+        if os.path.exists(upload["path"]):
+            os.unlink(upload["path"])
         logger.error(f"File upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temp file
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+    logger.info(f"Queued uploaded file {filename} ({upload['size']} bytes) as job {job['job_id']}")
+    return job
+
+
+@router.post("/upload", response_model=JobResponse, status_code=202, openapi_extra=_upload_form("file", many=False))
+async def upload_file(request: Request):
+    """Upload a file and queue its ingestion (PDF, DOCX, TXT, MD, HTML, PNG, JPG, JPEG, WEBP, GIF)
+
+    Form fields: ``file``, optional ``metadata`` (JSON) and ``chunking``.
+    """
+    upload = await _receive_upload(request, "file", max_files=1)
+    chunking = upload.fields.get("chunking") or None
+    try:
+        meta_dict = _parse_upload_options(upload.fields.get("metadata"), chunking)
+    except HTTPException:
+        upload.discard()
+        raise
+    return JobResponse(**await _queue_upload(upload.files[0], meta_dict, chunking))
+
+
+@router.post(
+    "/upload/batch",
+    response_model=BatchUploadResponse,
+    status_code=202,
+    openapi_extra=_upload_form("files", many=True),
+)
+async def upload_files(request: Request):
+    """Upload several files in one request and queue one ingestion job per file
+
+    ``metadata`` and chunking apply to every file; ``file_metadata`` is an
+    optional JSON list, in file order, of metadata for individual files.
+    A file that cannot be accepted is listed under ``rejected`` without
+    failing the others.
+    """
+    upload = await _receive_upload(request, "files", max_files=settings.UPLOAD_BATCH_MAX_FILES)
+    files = upload.files
+    chunking = upload.fields.get("chunking") or None
+    try:
+        meta_dict = _parse_upload_options(upload.fields.get("metadata"), chunking)
+        file_metadata = upload.fields.get("file_metadata")
+        try:
+            per_file = json.loads(file_metadata) if file_metadata else []
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid file_metadata JSON")
+        if (
+            not isinstance(per_file, list)
+            or len(per_file) > len(files)
+            or not all(isinstance(entry, dict) for entry in per_file)
+        ):
+            raise HTTPException(status_code=400, detail="file_metadata must be a list of objects, at most one per file")
+    except HTTPException:
+        upload.discard()
+        raise
+
+    jobs = []
+    rejected = []
+    for index, file in enumerate(files):
+        if "detail" in file:
+            rejected.append(RejectedUpload(
+                index=index, filename=file["filename"], status_code=file["status_code"], detail=file["detail"]
+            ))
+            continue
+        extra = per_file[index] if index < len(per_file) else {}
+        try:
+            jobs.append(JobResponse(**await _queue_upload(file, {**meta_dict, **extra}, chunking)))
+        except HTTPException as e:
+            rejected.append(RejectedUpload(
+                index=index, filename=file["filename"], status_code=e.status_code, detail=str(e.detail)
+            ))
+    return BatchUploadResponse(jobs=jobs, rejected=rejected)
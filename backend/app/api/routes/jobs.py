@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.models.job import JobListResponse, JobResponse, JobStatus
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs(status: Optional[JobStatus] = None, limit: int = Query(100, ge=1, le=1000)):
+    """List ingestion jobs, most recent first"""
+    jobs = await job_queue.list(status=status, limit=limit)
+    return JobListResponse(jobs=[JobResponse(**job) for job in jobs])
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status, progress and result of an ingestion job"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
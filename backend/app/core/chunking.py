@@ -1,42 +1,341 @@
-from typing import List
+from bisect import bisect_right
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
 import re
 from app.core.config import settings
+from app.core.tokens import get_encoding
+
+EXTRA_NEWLINES = re.compile(r"\n{3,}")
+
+PARAGRAPH_BREAK = re.compile(r"\n\n")
+SENTENCE_END = re.compile(r"[.!?][ \n]")
+# Units packed by TokenChunker: paragraphs, lines and sentences
+UNIT_END = re.compile(r"\n\n|\n|[.!?] ")
+
+# ATX headings and fenced code block markers for MarkdownChunker
+HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE = re.compile(r"^[ \t]*(```|~~~)")
+
+# Drop consumed text from the buffer once this much has accumulated
+COMPACT_THRESHOLD = 1 << 16
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse whitespace while preserving line and paragraph breaks
+
+    Runs of other whitespace within a line become one space and lines are
+    trimmed, so line and paragraph breaks survive as chunk boundaries.
+    """
+    lines = [" ".join(line.split()) for line in text.split("\n")]
+    if text[:1].isspace() and lines[0]:
+        lines[0] = " " + lines[0]
+    if text[-1:].isspace() and lines[-1]:
+        lines[-1] += " "
+    return EXTRA_NEWLINES.sub("\n\n", "\n".join(lines))
 
 
 class SemanticChunker:
-    """Split text into semantic chunks with overlap for RAG"""
+    """Split text into semantic chunks with overlap for RAG
+
+    Works in a single pass over a stream of text pieces: whitespace is
+    normalized piece by piece, paragraph and sentence boundaries are indexed
+    once as text arrives, and each chunk end is found with a binary search
+    over that index. Chunks prefer to end at a paragraph break, then at a
+    sentence end, and only fall back to a hard cut at ``chunk_size``.
+    """
 
     def __init__(self, chunk_size: int = None, overlap: int = None):
-        self.chunk_size = chunk_size or settings.CHUNK_SIZE
-        self.overlap = overlap or settings.CHUNK_OVERLAP
+        self.chunk_size = chunk_size if chunk_size is not None else settings.CHUNK_SIZE
+        self.overlap = overlap if overlap is not None else settings.CHUNK_OVERLAP
+        if self.overlap >= self.chunk_size:
+            raise ValueError("Chunk overlap must be smaller than chunk size")
 
     def chunk(self, text: str) -> List[str]:
         """Split text into semantic chunks with overlap"""
-        # Clean text
-        text = re.sub(r'\s+', ' ', text).strip()
+        return list(self.iter_chunks(
+            text[i:i + COMPACT_THRESHOLD] for i in range(0, len(text), COMPACT_THRESHOLD)
+        ))
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Yield chunks from an iterator of text pieces without holding the whole text"""
+        for text, _, _ in self.iter_spans(pieces):
+            yield text
+
+    def iter_spans(self, pieces: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+        """Yield (chunk, start, end) with offsets into the normalized text stream"""
+        stream = self.stream()
+        for piece in pieces:
+            yield from stream.feed(piece)
+        yield from stream.close()
+
+    def stream(self) -> "ChunkStream":
+        """Incremental chunker state for text that arrives from an async source"""
+        return ChunkStream(self)
+
+    def _find_end(self, start: int, paragraphs: List[int], sentences: List[int]) -> int:
+        """Pick the chunk end for a chunk beginning at ``start``"""
+        limit = start + self.chunk_size
+        # A break inside the overlap would not move the next chunk forward
+        floor = start + self.overlap
+
+        i = bisect_right(paragraphs, limit) - 1
+        if i >= 0 and paragraphs[i] > max(floor, start + self.chunk_size // 2):
+            return paragraphs[i]
+        i = bisect_right(sentences, limit) - 1
+        if i >= 0 and sentences[i] > floor:
+            return sentences[i]
+        return limit
+
+    def _next_start(self, buf: str, base: int, end: int) -> int:
+        """Start of the next chunk: ``overlap`` characters back, snapped to a word start"""
+        start = end - self.overlap
+        rel = start - base
+        for i in range(rel, end - base):
+            if buf[i] in " \n":
+                return base + i + 1
+        return start
+
+
+class ChunkStream:
+    """Push-style state of a ``SemanticChunker`` pass
+
+    ``feed`` takes the next piece of text and returns the chunks it completed;
+    ``close`` flushes the rest. ``offset`` is the length of the normalized
+    stream so far, and ``piece_start`` is where the first non-whitespace
+    character of the last piece landed in it, so callers can map chunk
+    offsets back to their pieces.
+    """
+
+    def __init__(self, chunker: SemanticChunker):
+        self.chunker = chunker
+        self.buf = ""          # normalized text not yet discarded
+        self.base = 0          # absolute offset of buf[0]
+        self.start = 0         # absolute offset of the next chunk
+        self.scanned = 0       # absolute offset from which boundaries still need scanning
+        self.carry = ""        # trailing whitespace held back until the next piece
+        self.piece_start = 0
+        self.paragraphs: List[int] = []
+        self.sentences: List[int] = []
+
+    @property
+    def offset(self) -> int:
+        return self.base + len(self.buf)
+
+    def feed(self, piece: str) -> List[Tuple[str, int, int]]:
+        """Add a piece of raw text; return the chunks it completed"""
+        chunker = self.chunker
+        raw = self.carry + piece
+        stripped = raw.rstrip()
+        self.carry = raw[len(stripped):]
+        raw = stripped
+        if not raw:
+            self.piece_start = self.offset
+            return []
+
+        normalized = normalize_whitespace(raw)
+        if not self.buf and self.base == 0:
+            normalized = normalized.lstrip()
+        # Carried whitespace precedes the piece's own text, so the first
+        # visible character of the normalized text is the piece's
+        self.piece_start = self.offset + len(normalized) - len(normalized.lstrip())
+        buf = self.buf = self.buf + normalized
+        base = self.base
+
+        # Index boundaries in the new text; the last character is rescanned
+        # next time since its delimiter may be completed by the next piece
+        scan_from = max(self.scanned - base, 0)
+        for pattern, index in ((PARAGRAPH_BREAK, self.paragraphs), (SENTENCE_END, self.sentences)):
+            index.extend(base + m.end() for m in pattern.finditer(buf, scan_from))
+        self.scanned = base + len(buf) - 1
+
+        spans = []
+        start = self.start
+        while base + len(buf) - start > chunker.chunk_size:
+            end = chunker._find_end(start, self.paragraphs, self.sentences)
+            text = buf[start - base:end - base].strip()
+            if text:
+                spans.append((text, start, end))
+            start = chunker._next_start(buf, base, end)
+        self.start = start
+
+        if start - base > COMPACT_THRESHOLD:
+            self.buf = buf[start - base:]
+            self.base = start
+            self.paragraphs = self.paragraphs[bisect_right(self.paragraphs, start):]
+            self.sentences = self.sentences[bisect_right(self.sentences, start):]
+        return spans
+
+    def close(self) -> List[Tuple[str, int, int]]:
+        """Flush the trailing text at end of stream (carried whitespace is dropped)"""
+        chunker, buf, base, start = self.chunker, self.buf, self.base, self.start
+        total = base + len(buf)
+        spans = []
+        while start < total:
+            if total - start <= chunker.chunk_size:
+                end = total
+            else:
+                end = chunker._find_end(start, self.paragraphs, self.sentences)
+            text = buf[start - base:end - base].strip()
+            if text:
+                spans.append((text, start, end))
+            if end >= total:
+                break
+            start = chunker._next_start(buf, base, end)
+        self.start = total
+        return spans
+
 
+class TokenChunker:
+    """Split text into chunks of at most ``chunk_size`` tokens
+
+    Sizes are counted with a local BPE tokenizer, so chunks are the same size
+    in tokens whether the text is prose, code or CJK. Paragraphs, lines and
+    sentences are packed whole; only a unit longer than a chunk is cut at a
+    token boundary. ``overlap`` tokens of trailing units carry over.
+    """
+
+    def __init__(self, chunk_size: int = None, overlap: int = None, encoding: str = None):
+        self.chunk_size = chunk_size if chunk_size is not None else settings.CHUNK_TOKENS
+        self.overlap = overlap if overlap is not None else settings.CHUNK_TOKEN_OVERLAP
+        self.encoding_name = encoding or settings.CHUNK_TOKENIZER
+        if self.overlap >= self.chunk_size:
+            raise ValueError("Chunk overlap must be smaller than chunk size")
+
+    @property
+    def encoding(self):
+        return get_encoding(self.encoding_name)
+
+    def chunk(self, text: str) -> List[str]:
+        """Split text into token-bounded chunks with overlap"""
+        return self._pack(normalize_whitespace(text).strip(), self.chunk_size)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def _pack(self, text: str, limit: int) -> List[str]:
+        """Greedily pack boundary-delimited units into chunks of at most ``limit`` tokens"""
         if not text:
             return []
 
-        chunks = []
+        units = []
         start = 0
+        for m in UNIT_END.finditer(text):
+            units.append(text[start:m.end()])
+            start = m.end()
+        if start < len(text):
+            units.append(text[start:])
+        counts = [len(ids) for ids in self.encoding.encode_ordinary_batch(units)]
+
+        overlap = min(self.overlap, limit // 2)
+        chunks: List[str] = []
+        window: Deque[Tuple[str, int]] = deque()
+        total = 0
+        fresh = False  # window holds units not yet emitted
+
+        def emit():
+            chunk = "".join(unit for unit, _ in window).strip()
+            if chunk:
+                chunks.append(chunk)
+
+        for unit, count in zip(units, counts):
+            if count > limit:
+                if fresh:
+                    emit()
+                window.clear()
+                total = 0
+                fresh = False
+                chunks.extend(self._split_tokens(unit, limit, overlap))
+                continue
 
-        while start < len(text):
-            end = start + self.chunk_size
+            if total + count > limit and fresh:
+                emit()
+                while window and (total > overlap or total + count > limit):
+                    total -= window.popleft()[1]
+            window.append((unit, count))
+            total += count
+            fresh = True
 
-            # Try to break at sentence boundary
-            if end < len(text):
-                # Look for sentence endings in reverse order
-                for delimiter in ['. ', '! ', '? ', '.\n', '!\n', '?\n', '\n\n']:
-                    last_pos = text.rfind(delimiter, start, end)
-                    if last_pos != -1:
-                        end = last_pos + len(delimiter)
-                        break
+        if fresh:
+            emit()
+        return chunks
 
-            chunk = text[start:end].strip()
+    def _split_tokens(self, text: str, limit: int, overlap: int) -> List[str]:
+        """Hard-cut a single oversized unit at token boundaries"""
+        ids = self.encoding.encode_ordinary(text)
+        chunks = []
+        for i in range(0, len(ids), limit - overlap):
+            chunk = self.encoding.decode(ids[i:i + limit], errors="ignore").strip()
             if chunk:
                 chunks.append(chunk)
+            if i + limit >= len(ids):
+                break
+        return chunks
+
 
-            start = end - self.overlap
+class MarkdownChunker(TokenChunker):
+    """Token-bounded chunks that never straddle a markdown section
 
+    Text is split at ATX headings outside fenced code blocks. Each section is
+    packed like ``TokenChunker`` and every chunk is prefixed with the heading
+    path leading to it, so a chunk still says which section it came from.
+    Text without headings is chunked exactly like ``TokenChunker``.
+    """
+
+    def chunk(self, text: str) -> List[str]:
+        """Split text into heading-prefixed, token-bounded chunks"""
+        chunks: List[str] = []
+        for path, body in self.sections(text):
+            body = normalize_whitespace(body).strip()
+            if not body:
+                continue
+            title = "\n".join(path)
+            if not title:
+                chunks.extend(self._pack(body, self.chunk_size))
+                continue
+            # Keep room for the title; very deep paths still leave half a chunk
+            prefix = f"{title}\n\n"
+            budget = max(self.chunk_size - self.count_tokens(prefix), self.chunk_size // 2)
+            chunks.extend(prefix + piece for piece in self._pack(body, budget))
         return chunks
+
+    @staticmethod
+    def sections(text: str) -> Iterator[Tuple[List[str], str]]:
+        """Yield (heading path, section body) pairs in document order"""
+        path: List[Tuple[int, str]] = []
+        lines: List[str] = []
+        fence: Optional[str] = None
+
+        for line in text.splitlines():
+            marker = FENCE.match(line)
+            if marker:
+                if fence is None:
+                    fence = marker.group(1)
+                elif marker.group(1) == fence:
+                    fence = None
+            heading = HEADING.match(line) if fence is None else None
+            if heading:
+                yield [title for _, title in path], "\n".join(lines)
+                lines = []
+                level = len(heading.group(1))
+                while path and path[-1][0] >= level:
+                    path.pop()
+                path.append((level, f"{heading.group(1)} {heading.group(2)}"))
+            else:
+                lines.append(line)
+
+        yield [title for _, title in path], "\n".join(lines)
+
+
+CHUNKERS = {
+    "semantic": SemanticChunker,
+    "token": TokenChunker,
+    "markdown": MarkdownChunker,
+}
+
+
+def get_chunker(strategy: str = None):
+    """Build the chunker for a strategy name (defaults to CHUNKING_STRATEGY)"""
+    strategy = strategy or settings.CHUNKING_STRATEGY
+    if strategy not in CHUNKERS:
+        raise ValueError(f"Unknown chunking strategy: {strategy}. Supported: {', '.join(CHUNKERS)}")
+    return CHUNKERS[strategy]()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Dict, Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,17 @@ class Settings(BaseSettings):
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: int = 6333
     QDRANT_COLLECTION_NAME: str = "knowledge_base"
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_TIMEOUT: int = 30
+    QDRANT_MAX_CONNECTIONS: int = 50
+    QDRANT_QUANTIZATION: Literal["none", "scalar", "binary"] = "none"
+    QDRANT_ON_DISK_VECTORS: bool = False  # keep original vectors on disk, quantized ones in RAM
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    QDRANT_SEARCH_RESCORE: bool = True
+    QDRANT_UPSERT_BATCH_SIZE: int = 256
+    QDRANT_UPSERT_PARALLELISM: int = 4
+    QDRANT_UPSERT_WAIT: bool = True  # False = fire-and-forget, confirmed once the document is stored
 
     # LLM Providers
     DEFAULT_LLM_PROVIDER: Literal["openai", "deepseek", "anthropic", "ollama", "zai"] = "openai"
@@ -22,13 +33,87 @@ class Settings(BaseSettings):
     DEFAULT_EMBEDDING_PROVIDER: Literal["openai", "gemini", "ollama"] = "gemini"
     DEFAULT_EMBEDDING_MODEL: str = "text-embedding-3-small"
     GEMINI_API_KEY: str = ""
+    # Reduced output size (e.g. 768 or 256); None keeps the model's native size
+    EMBEDDING_DIMENSIONS: Optional[int] = None
+
+    # Embedding cache
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.db"
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 10000
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500000
+
+    # Embedding batching (limits are per provider request)
+    EMBEDDING_BATCH_MAX_TOKENS: Dict[str, int] = {"openai": 100000, "gemini": 20000, "ollama": 8000}
+    EMBEDDING_BATCH_MAX_SIZE: Dict[str, int] = {"openai": 512, "gemini": 100, "ollama": 32}
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_BATCH_LINGER_MS: int = 20
+
+    # Ingestion: embed+upsert batches in flight per document before chunking waits
+    INGEST_MAX_INFLIGHT_BATCHES: int = 8
+
+    # Background ingestion jobs (/ingest and /upload return a job ID at once)
+    JOB_WORKERS: int = 2  # documents ingested concurrently
+    JOB_STORE_PATH: str = "data/jobs.db"
+    JOB_UPLOAD_DIR: str = "data/uploads"  # uploaded files kept until their job finishes
+    UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # uploads are streamed to disk in blocks of this size
+    UPLOAD_BATCH_MAX_FILES: int = 100
+    JOB_MAX_ATTEMPTS: int = 3  # runs of a job interrupted by crashes before it is failed
+    JOB_RETENTION_DAYS: int = 7  # finished jobs are pruned on startup after this
+
+    # Local document store (chunk manifests)
+    DOCUMENT_STORE_PATH: str = "data/documents.db"
+
+    # Web fetching (shared client; validators cached to skip unchanged pages)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 6
+    HTTP_MAX_RESPONSE_BYTES: int = 20 * 1024 * 1024
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_PATH: str = "data/http_cache.db"
+    HTML_EXTRACTOR: Literal["lxml", "bs4"] = "lxml"  # lxml = main content only, bs4 = whole page
+
+    # Bulk URL ingestion
+    CRAWL_MAX_CONCURRENCY: int = 8
+    CRAWL_MAX_PER_HOST: int = 2
+    CRAWL_MAX_URLS: int = 10000  # per request, after sitemap expansion
+    CRAWL_DEFAULT_DELAY: float = 0.0  # seconds between requests to one host
+    CRAWL_USER_AGENT: str = "pks"  # product token matched against robots.txt rules
+
+    # Parsing (CPU-bound extraction runs in a process pool)
+    PARSE_WORKERS: int = 0  # 0 = one per CPU core
+    PARSE_CONCURRENCY: Dict[str, int] = {"pdf": 2, "docx": 2, "txt": 4, "html": 4}
+    PARSE_TIMEOUT_SECONDS: float = 120.0
+    PARSE_MEMORY_LIMIT_MB: int = 2048  # per worker address space; 0 disables
+    PARSE_PDF_PAGES_PER_JOB: int = 20  # PDF page ranges fanned out across workers
 
     # Chunking
-    CHUNK_SIZE: int = 1000
+    CHUNKING_STRATEGY: Literal["semantic", "token", "markdown"] = "semantic"
+    CHUNK_SIZE: int = 1000  # characters, semantic strategy
     CHUNK_OVERLAP: int = 200
+    CHUNK_TOKENS: int = 512  # tokens, token and markdown strategies
+    CHUNK_TOKEN_OVERLAP: int = 64
+    CHUNK_TOKENIZER: str = "cl100k_base"
 
     # RAG
     TOP_K_RESULTS: int = 5
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_PREFETCH_MULTIPLIER: int = 4
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    BM25_AVG_DOC_TOKENS: float = 200.0
+
+    # Context packing: prompt token budget for retrieved passages, per LLM provider
+    CONTEXT_TOKEN_BUDGET: Dict[str, int] = {
+        "openai": 6000, "deepseek": 6000, "anthropic": 6000, "zai": 6000, "ollama": 2000,
+    }
+
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
 
     # Frontend
     NEXT_PUBLIC_API_URL: str = "http://localhost:8000"
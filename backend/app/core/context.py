@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional, Set
+from app.core.tokens import estimate_tokens
+import re
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Source label, URL and title lines added around each passage in the prompt
+PASSAGE_OVERHEAD_TOKENS = 20
+
+
+def _merge_overlap(left: str, right: str, min_overlap: int) -> Optional[str]:
+    """Join two chunks if the end of ``left`` repeats the start of ``right``"""
+    probe = right[:min_overlap]
+    if len(probe) < min_overlap:
+        return None
+    # The chunker's overlap is a suffix of the previous chunk, so search from the end
+    pos = left.rfind(probe)
+    while pos != -1:
+        tail = left[pos:]
+        if right.startswith(tail):
+            return left + right[len(tail):]
+        pos = left.rfind(probe, 0, pos)
+    return None
+
+
+def _shingles(text: str, size: int = 5) -> Set[int]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+class ContextPacker:
+    """Assemble retrieved chunks into a compact, token-budgeted context
+
+    Overlapping chunks of the same document are merged into one passage,
+    near-duplicate passages are dropped, and the remainder is added in score
+    order until the token budget is spent.
+    """
+
+    def __init__(self, min_overlap: int = 30, duplicate_threshold: float = 0.8):
+        self.min_overlap = min_overlap
+        self.duplicate_threshold = duplicate_threshold
+
+    def _merge_document(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge chunks of one document that overlap at either end"""
+        passages: List[Dict[str, Any]] = []
+        for chunk in chunks:
+            passage = {**chunk}
+            merged = True
+            while merged:
+                merged = False
+                for i, other in enumerate(passages):
+                    text = (
+                        _merge_overlap(other["text"], passage["text"], self.min_overlap)
+                        or _merge_overlap(passage["text"], other["text"], self.min_overlap)
+                    )
+                    if text is not None:
+                        passage = {**passage, "text": text, "score": max(passage["score"], other["score"])}
+                        del passages[i]
+                        merged = True
+                        break
+            passages.append(passage)
+        return passages
+
+    def _is_duplicate(self, shingles: Set[int], kept: List[Set[int]]) -> bool:
+        for other in kept:
+            if not shingles or not other:
+                continue
+            overlap = len(shingles & other) / min(len(shingles), len(other))
+            if overlap >= self.duplicate_threshold:
+                return True
+        return False
+
+    def pack(self, results: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+        """Return passages to include in the prompt, highest score first"""
+        by_document: Dict[str, List[Dict[str, Any]]] = {}
+        for r in results:
+            key = r.get("document_id") or str(r.get("id"))
+            by_document.setdefault(key, []).append({**r, "score": r.get("score") or 0.0})
+
+        passages = [p for chunks in by_document.values() for p in self._merge_document(chunks)]
+        passages.sort(key=lambda p: p["score"], reverse=True)
+
+        packed = []
+        kept_shingles: List[Set[int]] = []
+        remaining = token_budget
+        for passage in passages:
+            shingles = _shingles(passage["text"])
+            if self._is_duplicate(shingles, kept_shingles):
+                continue
+            tokens = estimate_tokens(passage["text"]) + PASSAGE_OVERHEAD_TOKENS
+            if tokens > remaining:
+                if packed:
+                    continue
+                # Never return an empty context: trim the best passage to fit
+                passage = {**passage, "text": passage["text"][:max(remaining - PASSAGE_OVERHEAD_TOKENS, 0) * 4]}
+                tokens = remaining
+            packed.append(passage)
+            kept_shingles.append(shingles)
+            remaining -= tokens
+            if remaining <= 0:
+                break
+        return packed
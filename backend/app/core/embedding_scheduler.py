@@ -0,0 +1,123 @@
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Set, Tuple
+from app.core.tokens import estimate_tokens
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingScheduler:
+    """Pack texts from concurrent callers into token-bounded provider batches
+
+    Every ``submit`` call enqueues its texts; a single dispatcher task drains
+    the queue into batches limited by estimated tokens and item count, and
+    runs at most ``max_concurrency`` batches against the provider at once.
+    Texts from different ingestions that arrive within ``linger_ms`` of each
+    other share batches.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        max_batch_tokens: int,
+        max_batch_size: int,
+        max_concurrency: int = 4,
+        linger_ms: int = 20,
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.linger = linger_ms / 1000
+        self._queue: Deque[Tuple[str, int, asyncio.Future]] = deque()
+        self._queued_tokens = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def _ensure_dispatcher(self):
+        """Start (or restart, if the event loop changed) the dispatcher task"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._dispatcher = None
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def submit(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sharing provider batches with other callers"""
+        if not texts:
+            return []
+        self._ensure_dispatcher()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            tokens = estimate_tokens(text)
+            self._queue.append((text, tokens, future))
+            self._queued_tokens += tokens
+            futures.append(future)
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    def _batch_ready(self) -> bool:
+        return len(self._queue) >= self.max_batch_size or self._queued_tokens >= self.max_batch_tokens
+
+    def _take_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Pop the next batch that fits the token and size limits"""
+        batch = []
+        batch_tokens = 0
+        while self._queue and len(batch) < self.max_batch_size:
+            text, tokens, future = self._queue[0]
+            # An oversized text still goes out on its own
+            if batch and batch_tokens + tokens > self.max_batch_tokens:
+                break
+            self._queue.popleft()
+            self._queued_tokens -= tokens
+            if future.cancelled():
+                continue
+            batch.append((text, future))
+            batch_tokens += tokens
+        return batch
+
+    async def _dispatch(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Give concurrent callers a moment to add to a partial batch
+            if not self._batch_ready():
+                await asyncio.sleep(self.linger)
+
+            await self._semaphore.acquire()
+            batch = self._take_batch()
+            if not batch:
+                self._semaphore.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            vectors = await self.embed_fn([text for text, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Provider returned {len(vectors)} embeddings for {len(batch)} texts")
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+            logger.info(f"Embedded batch of {len(batch)} texts")
+        except Exception as e:
+            logger.error(f"Embedding batch failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._semaphore.release()
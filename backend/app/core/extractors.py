@@ -0,0 +1,92 @@
+from typing import Dict, List
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+import PyPDF2
+import docx
+from app.core.html_extraction import extract_main_content
+
+# These run inside parse pool worker processes; keep settings and service
+# imports out of this module so spawned workers start fast
+
+
+def fallback_title(url: str) -> str:
+    """Title for a page without one: the host, else the last path segment"""
+    parsed = urlparse(url)
+    return parsed.netloc if parsed.netloc else url.split('/')[-1] or url
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Number of pages in a PDF"""
+    with open(file_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``start`` to ``stop`` (0-based, exclusive) of a PDF"""
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_docx(file_path: str) -> str:
+    """Extract text from DOCX"""
+    doc = docx.Document(file_path)
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+
+
+def extract_txt(file_path: str) -> str:
+    """Extract text from TXT or MD"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read().strip()
+
+
+def extract_html_bs4(content: bytes, url: str) -> Dict[str, str]:
+    """Whole-page text via BeautifulSoup's html.parser, minus scripts and page chrome tags"""
+    soup = BeautifulSoup(content, "html.parser")
+
+    title = soup.find('title')
+    title_text = title.text.strip() if title else ""
+
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    text = soup.get_text()
+
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+
+    return {"text": text, "title": title_text}
+
+
+def extract_html_lxml(content: bytes, url: str) -> Dict[str, str]:
+    """Main content via lxml with readability-style scoring, titles from JSON-LD/Open Graph"""
+    if not content.strip():
+        return {"text": "", "title": ""}
+    page = extract_main_content(content)
+    if page is None:
+        # Not parseable as HTML (empty or binary body); let the lenient parser try
+        return extract_html_bs4(content, url)
+    return page
+
+
+HTML_EXTRACTORS = {
+    "lxml": extract_html_lxml,
+    "bs4": extract_html_bs4,
+}
+
+
+def extract_html(content: bytes, url: str, engine: str = "lxml") -> Dict[str, str]:
+    """Extract text, title and any article metadata from an HTML page"""
+    page = HTML_EXTRACTORS[engine](content, url)
+    page["title"] = page.get("title") or fallback_title(url)
+    return page
+
+
+def extract_html_file(file_path: str, engine: str = "lxml") -> str:
+    """Extract text from a saved HTML page"""
+    with open(file_path, "rb") as file:
+        content = file.read()
+    return HTML_EXTRACTORS[engine](content, file_path)["text"].strip()
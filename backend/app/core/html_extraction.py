@@ -0,0 +1,216 @@
+from typing import Any, Dict, List, Optional
+import json
+import re
+import lxml.html
+from lxml import etree
+
+# Readability-style main-content extraction on lxml. Runs inside parse pool
+# workers, like the rest of app.core.extractors.
+
+# Never content, dropped before scoring
+JUNK_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+    "button", "input", "select", "textarea", "nav", "footer", "aside", "dialog",
+]
+# class/id fragments of page chrome: menus, banners, share bars, comment threads
+NEGATIVE = re.compile(
+    r"cookie|consent|gdpr|banner|sidebar|side-bar|menu|navbar|breadcrumb|footer|masthead|"
+    r"share|social|comment|related|recommend|promo|sponsor|advert|\bads?\b|popup|modal|"
+    r"newsletter|subscribe|signup|widget|skip-link|pagination|toolbar",
+    re.IGNORECASE,
+)
+POSITIVE = re.compile(r"article|content|entry|main|post|story|text|body|blog|prose", re.IGNORECASE)
+# Labels that keep an element even when it also matches NEGATIVE
+CONTENT_LABEL = re.compile(r"article|\bmain\b|\bcontent\b|entry-content|post-body|story-body", re.IGNORECASE)
+CHROME_ROLES = {"navigation", "banner", "contentinfo", "complementary", "dialog", "alertdialog"}
+
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol", "p", "pre",
+    "section", "table", "tr", "ul", "br",
+}
+CELL_TAGS = {"td", "th"}
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+PARAGRAPH_TAGS = ("p", "pre", "td", "blockquote", "li")
+
+# JSON-LD @type values whose headline/name is the page title
+ARTICLE_TYPES = {
+    "article", "newsarticle", "blogposting", "techarticle", "scholarlyarticle", "report",
+    "webpage", "howto", "recipe", "qapage", "product", "videoobject",
+}
+
+UTF8_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# A main-content candidate with less text than this falls back to the whole body
+MIN_CONTENT_CHARS = 250
+
+
+def _class_weight(el) -> int:
+    label = f"{el.get('class', '')} {el.get('id', '')}"
+    weight = 0
+    if NEGATIVE.search(label):
+        weight -= 25
+    if POSITIVE.search(label):
+        weight += 25
+    return weight
+
+
+def _text_length(el) -> int:
+    return len(" ".join(el.text_content().split()))
+
+
+def _link_density(el) -> float:
+    length = _text_length(el)
+    if not length:
+        return 1.0
+    links = sum(_text_length(a) for a in el.iter("a"))
+    return links / length
+
+
+def _is_chrome(el) -> bool:
+    if el.tag in ("html", "body", "article", "main"):
+        return False
+    if el.get("role") in CHROME_ROLES:
+        return True
+    label = f"{el.get('class', '')} {el.get('id', '')}"
+    return bool(NEGATIVE.search(label)) and not CONTENT_LABEL.search(label)
+
+
+def _remove_chrome(root):
+    """Drop junk tags and elements whose class/id/role marks them as page chrome"""
+    for el in list(root.iter(*JUNK_TAGS)) + [el for el in root.iter(etree.Element) if _is_chrome(el)]:
+        # Skip elements already removed along with an ancestor
+        if el.getparent() is not None and el.getroottree().getroot() is root.getroottree().getroot():
+            el.drop_tree()
+
+
+def _best_candidate(body):
+    """Score blocks by the paragraphs they contain and return the best one"""
+    # Semantic containers win outright when they hold real content
+    semantic = [el for el in body.iter("article", "main") if _text_length(el) >= MIN_CONTENT_CHARS]
+    semantic += [el for el in body.xpath('.//*[@role="main"]') if _text_length(el) >= MIN_CONTENT_CHARS]
+    if semantic:
+        return max(semantic, key=_text_length)
+
+    scores: Dict[Any, float] = {}
+    for paragraph in body.iter(*PARAGRAPH_TAGS):
+        length = _text_length(paragraph)
+        if length < 25:
+            continue
+        score = 1 + paragraph.text_content().count(",") + min(length // 100, 3)
+        parent = paragraph.getparent()
+        for ancestor, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+            if ancestor is None:
+                continue
+            if ancestor not in scores:
+                base = 5 if ancestor.tag == "div" else 3 if ancestor.tag in ("blockquote", "pre", "td") else 0
+                scores[ancestor] = base + _class_weight(ancestor)
+            scores[ancestor] += score * share
+
+    if not scores:
+        return None
+    return max(scores, key=lambda el: scores[el] * (1 - _link_density(el)))
+
+
+def _block_text(el) -> str:
+    """Text with line breaks at block boundaries and markdown-style headings"""
+    for child in el.iter(etree.Element):
+        level = HEADINGS.get(child.tag)
+        if level:
+            child.text = "#" * level + " " + (child.text or "").lstrip()
+        if child.tag in BLOCK_TAGS:
+            child.tail = "\n" + (child.tail or "")
+            child.text = "\n" + (child.text or "")
+        elif child.tag in CELL_TAGS:
+            child.tail = " | " + (child.tail or "")
+    lines = (" ".join(line.split()).rstrip(" |") for line in el.text_content().splitlines())
+    return "\n".join(line for line in lines if line and line.strip("#"))
+
+
+def _json_ld(root) -> List[Dict[str, Any]]:
+    """All objects in the page's JSON-LD blocks, with @graph flattened"""
+    objects = []
+    for script in root.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or "")
+        except ValueError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, dict):
+                objects.append(item)
+                stack.extend(item.get("@graph", []))
+            elif isinstance(item, list):
+                stack.extend(item)
+    return objects
+
+
+def _ld_types(item: Dict[str, Any]) -> List[str]:
+    types = item.get("@type", [])
+    return [t.lower() for t in (types if isinstance(types, list) else [types]) if isinstance(t, str)]
+
+
+def _author_name(author: Any) -> str:
+    if isinstance(author, list):
+        return ", ".join(filter(None, (_author_name(a) for a in author)))
+    if isinstance(author, dict):
+        return author.get("name", "") or ""
+    return author if isinstance(author, str) else ""
+
+
+def _meta(root, *names: str) -> str:
+    for name in names:
+        values = root.xpath(f'//meta[@property="{name}" or @name="{name}"]/@content')
+        if values and values[0].strip():
+            return values[0].strip()
+    return ""
+
+
+def extract_metadata(root) -> Dict[str, str]:
+    """Title, author and publication date from JSON-LD, Open Graph and <title>"""
+    metadata = {"title": "", "author": "", "published": ""}
+    items = [item for item in _json_ld(root) if ARTICLE_TYPES.intersection(_ld_types(item))]
+    # A generic WebPage node often precedes the Article in @graph; prefer the article
+    items.sort(key=lambda item: "webpage" in _ld_types(item))
+    for item in items:
+        metadata["title"] = metadata["title"] or str(item.get("headline") or item.get("name") or "").strip()
+        metadata["author"] = metadata["author"] or _author_name(item.get("author"))
+        metadata["published"] = metadata["published"] or str(item.get("datePublished") or "")
+
+    metadata["title"] = metadata["title"] or _meta(root, "og:title", "twitter:title")
+    if not metadata["title"]:
+        titles = root.xpath("//title/text()")
+        metadata["title"] = " ".join(titles[0].split()) if titles else ""
+    if not metadata["title"]:
+        headings = root.xpath("//h1")
+        metadata["title"] = " ".join(headings[0].text_content().split()) if headings else ""
+    metadata["author"] = metadata["author"] or _meta(root, "author", "article:author")
+    metadata["published"] = metadata["published"] or _meta(root, "article:published_time", "date")
+    return metadata
+
+
+def extract_main_content(content: bytes) -> Optional[Dict[str, str]]:
+    """Main text and metadata of an HTML page, or None if it cannot be parsed"""
+    # libxml2 assumes Latin-1 when a page declares no charset; valid UTF-8 almost always is UTF-8
+    try:
+        content.decode("utf-8")
+        parser = UTF8_PARSER
+    except UnicodeDecodeError:
+        parser = None
+    try:
+        root = lxml.html.fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+    metadata = extract_metadata(root)
+    body = root.find("body")
+    if body is None:
+        body = root
+
+    _remove_chrome(body)
+    whole = _text_length(body)
+    candidate = _best_candidate(body)
+    if candidate is None or _text_length(candidate) < min(MIN_CONTENT_CHARS, whole):
+        candidate = body
+    return {**metadata, "text": _block_text(candidate)}
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _limit_memory(limit_mb: int):
+    """Worker initializer: cap the address space so a runaway parse fails with MemoryError"""
+    if limit_mb > 0:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class ParsePool:
+    """Run CPU-bound parsing in worker processes, awaitable from the event loop
+
+    Each job kind (``pdf``, ``docx``, ...) has its own concurrency limit, so a
+    burst of large PDFs cannot occupy every worker. No more jobs than there
+    are workers are submitted at once, so a job never waits in the
+    executor's queue and ``timeout`` only counts time spent running. A job
+    that exceeds it is killed by restarting the pool; jobs of other callers
+    lost in that restart are retried once on the new pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        concurrency: Dict[str, int],
+        timeout: float,
+        memory_limit_mb: int = 0,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that holds gRPC/SQLite threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_memory,
+                initargs=(self.memory_limit_mb,),
+            )
+        return self._executor
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores = {}
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if kind not in self._semaphores:
+            limit = self.concurrency.get(kind, self.concurrency.get("default", self.max_workers))
+            self._semaphores[kind] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[kind]
+
+    async def run(self, kind: str, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(*args)`` in a worker process, bounded by the limits for ``kind``"""
+        async with self._semaphore(kind), self._slots:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.wrap_future(executor.submit(fn, *args)), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Parse job ({kind}) exceeded {self.timeout}s, restarting parse pool")
+                    self._restart(executor)
+                    raise TimeoutError(f"Parsing {kind} took longer than {self.timeout}s") from None
+                except BrokenProcessPool:
+                    # Another job's timeout or a crashed worker took the pool down
+                    self._restart(executor)
+                    if attempt:
+                        raise
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Kill the workers of ``executor``; the next job starts a fresh pool"""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Set by whoever runs an ingest (the job queue); tasks spawned by the
+# pipeline inherit it, so deep pipeline stages can report without plumbing
+_reporter: ContextVar[Optional[ProgressCallback]] = ContextVar("ingest_progress", default=None)
+
+
+def report_progress(**fields: Any):
+    """Report pipeline progress to the current reporter, if any"""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(fields)
+
+
+@contextmanager
+def progress_reporter(callback: ProgressCallback) -> Iterator[None]:
+    """Route report_progress calls made in this context to ``callback``"""
+    token = _reporter.set(callback)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
@@ -0,0 +1,53 @@
+from collections import Counter
+from typing import List, Tuple
+import re
+import zlib
+
+# Identifiers, error codes and version strings survive as single tokens
+TOKEN_PATTERN = re.compile(r"[\w][\w.\-]*[\w]|[\w]", re.UNICODE)
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its of on or "
+    "such that the their then there these they this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase lexical tokens with stopwords removed"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _token_index(token: str) -> int:
+    """Stable 31-bit index for a token (Python's hash() is salted per process)"""
+    return zlib.crc32(token.encode("utf-8")) & 0x7FFFFFFF
+
+
+class BM25SparseEncoder:
+    """Encode text as BM25 term weights for a Qdrant sparse vector
+
+    Documents carry the BM25 term-frequency component; the IDF component is
+    applied by Qdrant at query time (``Modifier.IDF`` on the sparse vector),
+    so collection statistics never have to be tracked locally.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_tokens: float = 256.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_tokens = avg_doc_tokens
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        """Sparse (indices, values) for a chunk"""
+        tokens = tokenize(text)
+        if not tokens:
+            return [], []
+        length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_tokens)
+        weights = {}
+        for token, tf in Counter(tokens).items():
+            index = _token_index(token)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + length_norm)
+        return list(weights.keys()), list(weights.values())
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        """Sparse (indices, values) for a query; every distinct term counts once"""
+        indices = sorted({_token_index(token) for token in tokenize(text)})
+        return indices, [1.0] * len(indices)
@@ -0,0 +1,21 @@
+from functools import lru_cache
+import tiktoken
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for batching and budgeting
+
+    Roughly four characters per token for ASCII text; non-ASCII characters
+    (CJK in particular) are counted as one token each, which errs on the
+    side of overestimating.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return max(1, ascii_chars // 4 + (len(text) - ascii_chars))
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str) -> tiktoken.Encoding:
+    """Local BPE tokenizer for exact token counts, loaded once per encoding"""
+    return tiktoken.get_encoding(name)
@@ -0,0 +1,225 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import os
+import uuid
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Largest non-file form field (metadata JSON, chunking, ...)
+FORM_FIELD_MAX_BYTES = 1024 * 1024
+
+
+class UploadError(Exception):
+    """An upload that cannot be accepted, with the HTTP status to answer"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+class MultipartUpload:
+    """Read a multipart/form-data body, writing each file straight to ``upload_dir``
+
+    The body is parsed as it arrives: file data is hashed on the way and
+    written to its final path in ``block_bytes`` blocks, so memory use does
+    not grow with file size and every byte is written to disk once. Files of
+    the ``file_field`` field over ``max_file_bytes`` or with an extension not
+    in ``extensions`` are rejected. With ``skip_rejected`` the rejection is
+    recorded on the file and the rest of the body is still read; otherwise
+    reading stops with UploadError.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        upload_dir: str,
+        file_field: str,
+        extensions: Set[str],
+        max_file_bytes: int,
+        max_files: int,
+        block_bytes: int,
+        skip_rejected: bool = False,
+    ):
+        media_type, params = parse_options_header(content_type)
+        if media_type != b"multipart/form-data" or not params.get(b"boundary"):
+            raise UploadError(400, "Expected a multipart/form-data body")
+        self.boundary = params[b"boundary"]
+        self.upload_dir = upload_dir
+        self.file_field = file_field
+        self.extensions = extensions
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.block_bytes = max(1, block_bytes)
+        self.skip_rejected = skip_rejected
+        self.fields: Dict[str, str] = {}
+        # One dict per file in body order: filename, size, and path + sha256,
+        # or status_code + detail when rejected
+        self.files: List[Dict[str, Any]] = []
+        self._parts: List[Dict[str, Any]] = []
+        self._part: Dict[str, Any] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._ready: List[Dict[str, Any]] = []
+
+    async def read(self, stream: AsyncIterator[bytes]) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+        """Consume the body; returns (form fields, files)
+
+        Files written so far are removed if reading fails.
+        """
+        os.makedirs(self.upload_dir, exist_ok=True)
+        parser = MultipartParser(self.boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                await self._flush()
+            parser.finalize()
+            await self._flush()
+            if any("file" in part for part in self._parts):
+                raise UploadError(400, "Incomplete multipart body")
+        except BaseException as e:
+            self.discard()
+            if isinstance(e, MultipartParseError):
+                raise UploadError(400, f"Malformed multipart body: {str(e)}") from None
+            raise
+        return self.fields, self.files
+
+    def discard(self, upload: Optional[Dict[str, Any]] = None):
+        """Remove the stored files, or only ``upload``"""
+        for part in self._parts:
+            if upload is not None and part["upload"] is not upload:
+                continue
+            if "file" in part:
+                part.pop("file").close()
+            path = part["upload"].get("path")
+            if path and os.path.exists(path):
+                os.unlink(path)
+
+    async def _flush(self):
+        """Write buffered blocks, closing files whose part has ended"""
+        ready, self._ready = self._ready, []
+        for part in ready:
+            if "file" not in part:
+                continue
+            data = b"".join(part["buffer"])
+            part["buffer"] = []
+            part["buffered"] = 0
+            part["queued"] = False
+            await asyncio.to_thread(self._write, part["file"], data, part["done"])
+            if part["done"]:
+                del part["file"]
+
+    @staticmethod
+    def _write(file, data: bytes, close: bool):
+        file.write(data)
+        if close:
+            file.close()
+
+    def _reject(self, part: Dict[str, Any], status_code: int, detail: str):
+        upload = part["upload"]
+        upload["status_code"] = status_code
+        upload["detail"] = detail
+        self.discard(upload)
+        upload.pop("path", None)
+        if not self.skip_rejected:
+            raise UploadError(status_code, detail)
+
+    def _on_part_begin(self):
+        self._part = {"headers": {}}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._part["headers"][self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        part = self._part
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = _decode(options.get(b"name", b""))
+        if b"filename" not in options:
+            part["name"] = name
+            part["data"] = bytearray()
+            return
+        if name != self.file_field:
+            # File under another field name: its data is dropped
+            return
+        if len(self.files) >= self.max_files:
+            raise UploadError(400, f"Too many files. Maximum per request is {self.max_files}")
+
+        upload = {"filename": _decode(options[b"filename"]) or "unknown", "size": 0}
+        self.files.append(upload)
+        part["upload"] = upload
+        self._parts.append(part)
+        ext = os.path.splitext(upload["filename"])[1].lower()
+        if ext not in self.extensions:
+            self._reject(part, 400, f"Unsupported file type: {ext}. Supported: {', '.join(sorted(self.extensions))}")
+            return
+        upload["path"] = os.path.join(self.upload_dir, f"{uuid.uuid4()}{ext}")
+        part["file"] = open(upload["path"], "wb")
+        part["digest"] = hashlib.sha256()
+        part["buffer"] = []
+        part["buffered"] = 0
+        part["queued"] = False
+        part["done"] = False
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        part = self._part
+        block = data[start:end]
+        if "data" in part:
+            part["data"] += block
+            if len(part["data"]) > FORM_FIELD_MAX_BYTES:
+                raise UploadError(413, f"Form field '{part['name']}' is larger than {FORM_FIELD_MAX_BYTES} bytes")
+            return
+        if "file" not in part:
+            return
+        upload = part["upload"]
+        upload["size"] += len(block)
+        if upload["size"] > self.max_file_bytes:
+            self._reject(part, 413, f"File too large. Maximum size is {self.max_file_bytes} bytes")
+            return
+        part["digest"].update(block)
+        part["buffer"].append(block)
+        part["buffered"] += len(block)
+        if part["buffered"] >= self.block_bytes:
+            self._queue_write(part)
+
+    def _on_part_end(self):
+        part = self._part
+        if "data" in part:
+            self.fields[part["name"]] = _decode(bytes(part["data"]))
+        elif "file" in part:
+            part["upload"]["sha256"] = part["digest"].hexdigest()
+            part["done"] = True
+            self._queue_write(part)
+
+    def _queue_write(self, part: Dict[str, Any]):
+        if not part["queued"]:
+            part["queued"] = True
+            self._ready.append(part)
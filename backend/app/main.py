@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.api.routes import ingestion, chat, documents, health, settings as settings_route
+from app.api.routes import ingestion, chat, documents, health, jobs, settings as settings_route
 
 setup_logging()
 
@@ -24,20 +24,35 @@ app.add_middleware(
 app.include_router(ingestion.router, prefix="/api/v1", tags=["ingestion"])
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
 app.include_router(documents.router, prefix="/api/v1", tags=["documents"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(settings_route.router, prefix="/api/v1/settings", tags=["settings"])
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize Qdrant collection on startup"""
+    """Initialize Qdrant collection and document catalog, then resume queued ingestion jobs"""
     from app.services.qdrant_service import qdrant_service
-    from app.core.config import settings
+    from app.services.ingestion_service import ingestion_service
+    from app.services.embedding_service import embedding_service
+    from app.services.job_queue import job_queue
 
-    # Determine vector size based on embedding provider
-    # Gemini gemini-embedding-001: 3072, OpenAI text-embedding-3-small: 1536
-    vector_size = 3072 if settings.DEFAULT_EMBEDDING_PROVIDER == "gemini" else 1536
-    await qdrant_service.initialize_collection(vector_size=vector_size)
+    # Vector size follows the embedding model and EMBEDDING_DIMENSIONS
+    await qdrant_service.initialize_collection(vector_size=embedding_service.dimension)
+    await ingestion_service.sync_catalog()
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop ingestion workers, then release pooled Qdrant and HTTP connections and parse workers"""
+    from app.services.qdrant_service import qdrant_service
+    from app.services.parser_service import parser_service
+    from app.services.job_queue import job_queue
+
+    await job_queue.close()
+    await qdrant_service.close()
+    await parser_service.close()
 
 
 @app.get("/")
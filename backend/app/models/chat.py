@@ -22,3 +22,4 @@ class ChatResponse(BaseModel):
     response: str
     sources: List[SourceInfo]
     context_used: int
+    cached: bool = False
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
 
 
 class DocumentInfo(BaseModel):
@@ -8,12 +9,27 @@ class DocumentInfo(BaseModel):
     url: Optional[str] = ""
     source: str
     timestamp: Optional[str] = ""
+    chunk_count: int = 0
 
 
 class DocumentListResponse(BaseModel):
     documents: list[DocumentInfo]
+    next_cursor: Optional[str] = None
+    total: int = 0
 
 
 class DeleteResponse(BaseModel):
     status: str
     deleted_count: int
+
+
+class BulkDeleteRequest(BaseModel):
+    document_ids: Optional[List[str]] = Field(None, description="Delete these documents")
+    source: Optional[str] = Field(None, description="Delete documents from this source")
+    older_than: Optional[datetime] = Field(None, description="Delete documents ingested before this time")
+
+
+class BulkDeleteResponse(BaseModel):
+    status: str
+    documents_deleted: int
+    deleted_count: int
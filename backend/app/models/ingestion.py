@@ -1,15 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
+
+ChunkingStrategy = Literal["semantic", "token", "markdown"]
 
 
 class IngestRequest(BaseModel):
     url: Optional[str] = Field(None, description="URL to ingest")
     text: Optional[str] = Field(None, description="Raw text to ingest")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
+    chunking: Optional[ChunkingStrategy] = Field(
+        None, description="Chunking strategy: semantic, token or markdown (default: CHUNKING_STRATEGY)"
+    )
 
 
-class IngestResponse(BaseModel):
-    document_id: str
-    chunks_count: int
-    point_ids: list[str]
-    status: str
+class BulkIngestRequest(BaseModel):
+    urls: Optional[List[str]] = Field(None, description="URLs to ingest")
+    sitemap: Optional[str] = Field(None, description="Sitemap (or sitemap index) URL whose pages to ingest")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Metadata applied to every document")
+    chunking: Optional[ChunkingStrategy] = Field(
+        None, description="Chunking strategy: semantic, token or markdown (default: CHUNKING_STRATEGY)"
+    )
+    respect_robots: bool = Field(False, description="Skip URLs disallowed by robots.txt and honour Crawl-delay")
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, Literal
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: JobStatus
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+class JobListResponse(BaseModel):
+    jobs: list[JobResponse]
+
+
+class RejectedUpload(BaseModel):
+    index: int
+    filename: str
+    status_code: int
+    detail: str
+
+
+class BatchUploadResponse(BaseModel):
+    jobs: list[JobResponse]
+    rejected: list[RejectedUpload] = []
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.config import settings
+import hashlib
+import json
+import logging
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """Cache chat answers by query embedding
+
+    A lookup hits when a cached query under the same context key (history and
+    provider settings) has cosine similarity above the threshold. Entries
+    expire after a TTL and are dropped when a contributing document changes.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def context_key(history: List[Dict[str, str]], **provider_settings: Any) -> str:
+        """Hash of everything besides the query that shapes an answer"""
+        payload = json.dumps({"history": history, **provider_settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def lookup(self, query_vector: List[float], context_key: str) -> Optional[Dict[str, Any]]:
+        """Return the best cached answer above the similarity threshold"""
+        now = time.time()
+        with self._lock:
+            expired = [eid for eid, e in self._entries.items() if e["expires_at"] <= now]
+            for eid in expired:
+                del self._entries[eid]
+
+            candidates = [(eid, e) for eid, e in self._entries.items() if e["context_key"] == context_key]
+            if candidates:
+                query = self._normalize(query_vector)
+                matrix = np.stack([e["vector"] for _, e in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    eid, entry = candidates[best]
+                    self._entries.move_to_end(eid)
+                    self.hits += 1
+                    logger.info(f"Answer cache hit (similarity {scores[best]:.3f})")
+                    return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def store(self, query_vector: List[float], context_key: str, answer: Dict[str, Any], document_ids: Iterable[str]):
+        """Cache an answer along with the documents it was built from
+
+        Answers built from no documents are not cached: ingesting the
+        documents they lacked could never invalidate them.
+        """
+        document_ids = set(document_ids)
+        if not document_ids:
+            return
+        with self._lock:
+            self._entries[self._next_id] = {
+                "vector": self._normalize(query_vector),
+                "context_key": context_key,
+                "answer": answer,
+                "document_ids": document_ids,
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> int:
+        """Drop answers that used any of the given documents"""
+        document_ids = set(document_ids)
+        with self._lock:
+            stale = [eid for eid, e in self._entries.items() if e["document_ids"] & document_ids]
+            for eid in stale:
+                del self._entries[eid]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers")
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_SIMILARITY,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+)
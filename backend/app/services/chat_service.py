@@ -1,8 +1,10 @@
 from app.services.embedding_service import embedding_service
 from app.services.qdrant_service import qdrant_service
 from app.services.llm_provider_service import llm_provider_service
+from app.services.answer_cache import answer_cache
 from app.core.config import settings
-from typing import List, Dict, Any
+from app.core.context import ContextPacker
+from typing import AsyncIterator, List, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,22 +13,55 @@ logger = logging.getLogger(__name__)
 class ChatService:
     """RAG-powered chat service"""
 
+    def __init__(self):
+        self.context_packer = ContextPacker()
+
+    def _cache_context_key(self, history: List[Dict[str, str]]) -> str:
+        """Answer cache key for everything other than the query itself"""
+        return answer_cache.context_key(
+            history[-3:],
+            llm_provider=settings.DEFAULT_LLM_PROVIDER,
+            llm_model=settings.DEFAULT_LLM_MODEL,
+            embedding_provider=embedding_service.provider,
+            embedding_model=embedding_service.model,
+            embedding_dimensions=embedding_service.dimension,
+            top_k=settings.TOP_K_RESULTS,
+        )
+
+    async def _retrieve(self, query: str, query_vector: List[float]) -> List[Dict[str, Any]]:
+        """Retrieve chunks relevant to the query (dense, or hybrid dense + BM25)"""
+        results = await qdrant_service.search(query_vector, limit=settings.TOP_K_RESULTS, query_text=query)
+        logger.info(f"Retrieved {len(results)} relevant chunks")
+        return results
+
+    def _cache_answer(self, query_vector: List[float], context_key: str, answer: Dict[str, Any], results: List[Dict[str, Any]]):
+        if settings.ANSWER_CACHE_ENABLED:
+            answer_cache.store(
+                query_vector, context_key, answer, [r["document_id"] for r in results if r.get("document_id")]
+            )
+
     async def chat(self, query: str, conversation_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
         """Generate RAG-powered response to user query"""
+        history = conversation_history or []
+
         # Generate query embedding
         query_vector = await embedding_service.embed_text(query)
         logger.info(f"Generated query embedding")
 
-        # Retrieve relevant chunks
-        results = await qdrant_service.search(query_vector, limit=settings.TOP_K_RESULTS)
-        logger.info(f"Retrieved {len(results)} relevant chunks")
+        context_key = self._cache_context_key(history)
+        if settings.ANSWER_CACHE_ENABLED:
+            cached = answer_cache.lookup(query_vector, context_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        results = await self._retrieve(query, query_vector)
 
         # Build context
         context = self._build_context(results)
 
         # Generate response using LLM
         llm = llm_provider_service.get_llm()
-        prompt = self._build_prompt(query, context, conversation_history or [])
+        prompt = self._build_prompt(query, context, history)
 
         try:
             response = await llm.ainvoke(prompt)
@@ -53,16 +88,89 @@ class ChatService:
             logger.error(f"LLM response format unexpected: {type(response)}, response: {response}")
             raise ValueError("Could not extract content from LLM response")
 
-        return {
+        answer = {
             "response": content,
             "sources": self._extract_sources(results),
             "context_used": len(results),
         }
+        self._cache_answer(query_vector, context_key, answer, results)
+        return {**answer, "cached": False}
+
+    async def chat_stream(
+        self, query: str, conversation_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a RAG response as events: sources first, then tokens as they are generated
+
+        Closing the generator (e.g. when the client disconnects) closes the
+        underlying LLM stream, which cancels the provider request.
+        """
+        history = conversation_history or []
+        query_vector = await embedding_service.embed_text(query)
+        context_key = self._cache_context_key(history)
+
+        if settings.ANSWER_CACHE_ENABLED:
+            cached = answer_cache.lookup(query_vector, context_key)
+            if cached is not None:
+                yield {
+                    "type": "sources",
+                    "sources": cached["sources"],
+                    "context_used": cached["context_used"],
+                    "cached": True,
+                }
+                yield {"type": "token", "content": cached["response"]}
+                yield {"type": "done"}
+                return
+
+        results = await self._retrieve(query, query_vector)
+        sources = self._extract_sources(results)
+        yield {
+            "type": "sources",
+            "sources": sources,
+            "context_used": len(results),
+            "cached": False,
+        }
+
+        llm = llm_provider_service.get_llm()
+        prompt = self._build_prompt(query, self._build_context(results), history)
+
+        parts = []
+        stream = llm.astream(prompt)
+        try:
+            async for chunk in stream:
+                content = chunk.content if hasattr(chunk, "content") else chunk
+                if isinstance(content, list):
+                    # Some providers return content blocks instead of a plain string
+                    content = "".join(
+                        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+                    )
+                if content:
+                    parts.append(content)
+                    yield {"type": "token", "content": content}
+        finally:
+            await stream.aclose()
+
+        logger.info("Streamed LLM response")
+        # Only completed streams are cached
+        self._cache_answer(
+            query_vector,
+            context_key,
+            {"response": "".join(parts), "sources": sources, "context_used": len(results)},
+            results,
+        )
+        yield {"type": "done"}
 
     def _build_context(self, results: List[Dict[str, Any]]) -> str:
-        """Build context string from search results"""
+        """Build context string from search results
+
+        Overlapping chunks are merged, near-duplicates dropped and passages
+        added in score order up to the provider's token budget.
+        """
+        budget = settings.CONTEXT_TOKEN_BUDGET.get(settings.DEFAULT_LLM_PROVIDER, 4000)
+        passages = self.context_packer.pack(results, budget)
+        logger.info(f"Packed {len(results)} chunks into {len(passages)} passages")
+
         contexts = []
-        for i, r in enumerate(results):
+        for i, r in enumerate(passages):
             contexts.append(
                 f"[Source {i+1}] {r['text']}\n  URL: {r.get('url', 'N/A')}\n  Title: {r.get('title', 'N/A')}"
             )
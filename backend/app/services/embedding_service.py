@@ -2,11 +2,44 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from app.core.config import settings
-from typing import List
+from app.storage.embedding_cache import EmbeddingCache, cache_key
+from app.core.embedding_scheduler import EmbeddingScheduler
+from typing import List, Dict, Optional
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
+# Full output size of known models
+NATIVE_DIMENSIONS = {
+    "models/gemini-embedding-001": 3072,
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+    "mxbai-embed-large": 1024,
+    "nomic-embed-text": 768,
+}
+
+# Models trained with Matryoshka representation learning: a prefix of the
+# vector is itself a usable embedding once renormalised
+MATRYOSHKA_MODELS = {
+    "models/gemini-embedding-001",
+    "text-embedding-3-large",
+    "text-embedding-3-small",
+    "mxbai-embed-large",
+    "nomic-embed-text",
+}
+
+# Models whose API can return reduced dimensions directly
+NATIVE_DIMENSION_PARAM_MODELS = {"text-embedding-3-large", "text-embedding-3-small"}
+
+
+def truncate_and_normalize(vector: List[float], dimensions: int) -> List[float]:
+    """Keep the first ``dimensions`` components and rescale to unit length"""
+    head = vector[:dimensions]
+    norm = math.sqrt(sum(x * x for x in head))
+    return [x / norm for x in head] if norm else head
+
 
 class EmbeddingService:
     """Generate embeddings using multiple providers (OpenAI, Gemini)"""
@@ -14,6 +47,65 @@ class EmbeddingService:
     def __init__(self):
         self.provider = settings.DEFAULT_EMBEDDING_PROVIDER
         self._embeddings = None
+        self.cache = EmbeddingCache(
+            path=settings.EMBEDDING_CACHE_PATH,
+            memory_size=settings.EMBEDDING_CACHE_MEMORY_SIZE,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        ) if settings.EMBEDDING_CACHE_ENABLED else None
+        self.scheduler = EmbeddingScheduler(
+            embed_fn=self._embed_batch,
+            max_batch_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS.get(self.provider, 8000),
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE.get(self.provider, 32),
+            max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+            linger_ms=settings.EMBEDDING_BATCH_LINGER_MS,
+        )
+
+    @property
+    def model(self) -> str:
+        """Name of the embedding model in use for the configured provider"""
+        if self.provider == "gemini":
+            return "models/gemini-embedding-001"
+        if self.provider == "ollama":
+            return settings.DEFAULT_EMBEDDING_MODEL or "mxbai-embed-large"
+        return settings.DEFAULT_EMBEDDING_MODEL
+
+    def _base_model(self) -> str:
+        """Model name without an Ollama tag (``nomic-embed-text:v1.5`` -> ``nomic-embed-text``)"""
+        return self.model.split(":")[0]
+
+    @property
+    def dimension(self) -> int:
+        """Size of the vectors this service produces (and the collection must use)"""
+        if settings.EMBEDDING_DIMENSIONS:
+            return settings.EMBEDDING_DIMENSIONS
+        return NATIVE_DIMENSIONS.get(self._base_model(), 1536)
+
+    @property
+    def _truncate_to(self) -> Optional[int]:
+        """Dimension to truncate to locally, or None if the provider returns the right size"""
+        dimensions = settings.EMBEDDING_DIMENSIONS
+        base_model = self._base_model()
+        if not dimensions or base_model in NATIVE_DIMENSION_PARAM_MODELS:
+            return None
+        if dimensions == NATIVE_DIMENSIONS.get(base_model):
+            return None
+        if base_model not in MATRYOSHKA_MODELS:
+            raise ValueError(
+                f"EMBEDDING_DIMENSIONS={dimensions} is not supported for {self.model}: "
+                f"the model is not trained for truncated embeddings"
+            )
+        return dimensions
+
+    def _resize(self, vectors: List[List[float]]) -> List[List[float]]:
+        dimensions = self._truncate_to
+        if dimensions is None:
+            return vectors
+        return [truncate_and_normalize(v, dimensions) for v in vectors]
+
+    @property
+    def _cache_model(self) -> str:
+        """Model identity for cache keys; vectors of different sizes must not collide"""
+        return f"{self.model}@{self.dimension}"
 
     @property
     def embeddings(self):
@@ -22,7 +114,7 @@ class EmbeddingService:
                 if not settings.GEMINI_API_KEY:
                     raise ValueError("GEMINI_API_KEY not configured")
                 self._embeddings = GoogleGenerativeAIEmbeddings(
-                    model="models/gemini-embedding-001",
+                    model=self.model,
                     google_api_key=settings.GEMINI_API_KEY,
                 )
                 logger.info("Initialized Gemini embeddings (gemini-embedding-001)")
@@ -32,25 +124,64 @@ class EmbeddingService:
                 self._embeddings = OpenAIEmbeddings(
                     model=settings.DEFAULT_EMBEDDING_MODEL,
                     openai_api_key=settings.OPENAI_API_KEY,
+                    dimensions=settings.EMBEDDING_DIMENSIONS
+                    if self._base_model() in NATIVE_DIMENSION_PARAM_MODELS else None,
                 )
                 logger.info(f"Initialized OpenAI embeddings: {settings.DEFAULT_EMBEDDING_MODEL}")
             elif self.provider == "ollama":
                 self._embeddings = OllamaEmbeddings(
-                    model=settings.DEFAULT_EMBEDDING_MODEL or "mxbai-embed-large",
+                    model=self.model,
                     base_url=settings.OLLAMA_BASE_URL,
                 )
-                logger.info(f"Initialized Ollama embeddings: {settings.DEFAULT_EMBEDDING_MODEL or 'mxbai-embed-large'}")
+                logger.info(f"Initialized Ollama embeddings: {self.model}")
             else:
                 raise ValueError(f"Unknown embedding provider: {self.provider}")
         return self._embeddings
 
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Send one scheduler batch to the provider"""
+        return self._resize(await self.embeddings.aembed_documents(texts))
+
     async def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
-        return await self.embeddings.aembed_query(text)
+        if self.cache is None:
+            return self._resize([await self.embeddings.aembed_query(text)])[0]
+
+        key = cache_key(self.provider, self._cache_model, text)
+        cached = await self.cache.aget_many([key])
+        if key in cached:
+            return cached[key]
+
+        vector = self._resize([await self.embeddings.aembed_query(text)])[0]
+        await self.cache.aput_many({key: vector})
+        return vector
 
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
-        return await self.embeddings.aembed_documents(texts)
+        """Generate embeddings for multiple texts, only sending cache misses to the provider"""
+        if self.cache is None or not texts:
+            return await self.scheduler.submit(texts)
+
+        keys = [cache_key(self.provider, self._cache_model, t) for t in texts]
+        found = await self.cache.aget_many(keys)
+
+        # Deduplicate misses so repeated chunks are embedded once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = await self.scheduler.submit(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            await self.cache.aput_many(fresh)
+            found.update(fresh)
+
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        return [found[key] for key in keys]
+
+    async def acache_stats(self) -> Dict[str, int]:
+        """Return embedding cache counters"""
+        return await self.cache.astats() if self.cache is not None else {}
 
 
 embedding_service = EmbeddingService()
@@ -1,24 +1,50 @@
-from app.core.chunking import SemanticChunker
+from app.core.chunking import SemanticChunker, get_chunker
 from app.services.embedding_service import embedding_service
 from app.services.qdrant_service import qdrant_service
 from app.services.youtube_service import youtube_service
 from app.services.parser_service import parser_service
-from typing import Dict, Any
+from app.storage.document_store import document_store
+from app.services.answer_cache import answer_cache
+from app.core.config import settings
+from app.core.crawler import BulkCrawler
+from app.core.extractors import fallback_title
+from app.storage.http_cache import HttpCache
+from app.core.progress import report_progress
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Namespace for deterministic document and chunk point IDs
+ID_NAMESPACE = uuid.UUID("6f1c2d4e-8a3b-5c7d-9e0f-1a2b3c4d5e6f")
+
 
 class IngestionService:
     """Core ingestion pipeline for processing and storing knowledge"""
 
     def __init__(self):
-        self.chunker = SemanticChunker()
+        self.chunkers = {}
+        self.http_cache = HttpCache(settings.HTTP_CACHE_PATH) if settings.HTTP_CACHE_ENABLED else None
+
+    def _chunker(self, strategy: Optional[str] = None):
+        """Chunker for a strategy, built once and reused across requests"""
+        strategy = strategy or settings.CHUNKING_STRATEGY
+        if strategy not in self.chunkers:
+            self.chunkers[strategy] = get_chunker(strategy)
+        return self.chunkers[strategy]
 
-    async def ingest_url(self, url: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def ingest_url(
+        self, url: str, metadata: Dict[str, Any] = None, chunking: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Ingest content from a URL"""
         metadata = metadata or {}
+        report_progress(stage="fetching")
 
         # Check if YouTube
         if "youtube.com" in url or "youtu.be" in url:
@@ -26,17 +52,120 @@ class IngestionService:
             metadata["source"] = "youtube"
             metadata["title"] = f"YouTube: {url.split('=')[-1]}" if "v=" in url else "YouTube Video"
         else:
-            text, title = await parser_service.fetch_webpage(url)
-            metadata["source"] = "web"
-            metadata["title"] = title
+            return await self._ingest_webpage(url, metadata, chunking)
+
+        metadata["url"] = url
+        return await self._process_text(text, metadata, chunking)
+
+    async def ingest_urls(
+        self,
+        urls: Optional[List[str]] = None,
+        sitemap: Optional[str] = None,
+        metadata: Dict[str, Any] = None,
+        chunking: Optional[str] = None,
+        respect_robots: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Ingest a list of URLs and/or the pages of a sitemap concurrently
+
+        Yields a ``queued`` event with the number of URLs, one ``result`` event
+        per URL in completion order, then ``done`` with per-status counts. Each
+        URL goes through the normal pipeline, so concurrent documents share
+        embedding batches.
+        """
+        metadata = metadata or {}
+        crawler = BulkCrawler(
+            ingest_fn=lambda url: self.ingest_url(url, dict(metadata), chunking),
+            fetch_fn=parser_service.fetch_bytes,
+            max_concurrency=settings.CRAWL_MAX_CONCURRENCY,
+            max_per_host=settings.CRAWL_MAX_PER_HOST,
+            respect_robots=respect_robots,
+            user_agent=settings.CRAWL_USER_AGENT,
+            default_delay=settings.CRAWL_DEFAULT_DELAY,
+        )
+
+        targets = list(urls or [])
+        if sitemap:
+            targets += await crawler.expand_sitemap(sitemap, settings.CRAWL_MAX_URLS)
+        targets = list(dict.fromkeys(url.strip() for url in targets if url.strip()))[:settings.CRAWL_MAX_URLS]
+        logger.info(f"Bulk ingestion of {len(targets)} URLs")
+
+        yield {"type": "queued", "total": len(targets)}
+        counts = Counter()
+        async for result in crawler.run(targets):
+            counts[result["status"]] += 1
+            yield {"type": "result", **result}
+        yield {"type": "done", "counts": dict(counts)}
+
+    async def _ingest_webpage(
+        self, url: str, metadata: Dict[str, Any], chunking: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ingest a web page, skipping it entirely if unchanged since the last ingest
 
+        A conditional GET is only sent when the document's chunks are known to
+        be stored, and validators are only saved once ingestion has succeeded,
+        so a failed ingest is never mistaken for an unchanged page.
+        """
+        metadata["source"] = "web"
         metadata["url"] = url
-        return await self._process_text(text, metadata)
+        document_id = self._document_id(f"url:{url}", metadata)
+
+        strategy = chunking or settings.CHUNKING_STRATEGY
+        cached = None
+        manifest = {}
+        if self.http_cache is not None:
+            manifest = await document_store.aget_manifest(document_id)
+            if manifest:
+                cached = await self.http_cache.aget(url)
+            if cached and (cached["chunking"], cached["extractor"]) != (strategy, settings.HTML_EXTRACTOR):
+                # Re-extracting or re-chunking with another strategy needs the page body
+                cached = None
+
+        try:
+            page = await parser_service.fetch_page(url, cached)
+        except Exception as e:
+            # Never store a placeholder: under this document ID it would replace the real chunks
+            logger.error(f"Error fetching webpage {url}: {str(e)}")
+            raise ValueError(f"Could not fetch {url}: {str(e)}") from e
+
+        if page is None:
+            metadata["document_id"] = document_id
+            metadata["title"] = cached.get("title") or metadata.get("title") or fallback_title(url)
+            return {
+                "document_id": document_id,
+                "chunks_count": len(manifest),
+                "point_ids": list(manifest),
+                "chunks_embedded": 0,
+                "chunks_deleted": 0,
+                "status": "unchanged",
+                "title": metadata["title"],
+                "source": "web",
+                "url": url,
+            }
+
+        metadata["title"] = page["title"]
+        for key in ("author", "published"):
+            if page.get(key) and not metadata.get(key):
+                metadata[key] = page[key]
+        result = await self._process_text(page["text"], metadata, chunking)
+        if self.http_cache is not None and page.get("body_hash"):
+            await self.http_cache.aput(url, {**page, "chunking": strategy, "extractor": settings.HTML_EXTRACTOR})
+        return result
+
+    async def ingest_file(
+        self,
+        file_path: str,
+        metadata: Dict[str, Any] = None,
+        chunking: Optional[str] = None,
+        file_sha256: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Ingest content from a file
 
-    async def ingest_file(self, file_path: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Ingest content from a file"""
+        When the caller already hashed the file (uploads are hashed while
+        they are written to disk), a file whose contents were ingested before
+        with the same chunking strategy is reported as unchanged without
+        being parsed.
+        """
         metadata = metadata or {}
-        text = await parser_service.parse_file(file_path)
         metadata["source"] = "file"
         metadata["filename"] = file_path
         # Use filename as title (without extension)
@@ -47,9 +176,52 @@ class IngestionService:
         if "title" not in metadata:
             metadata["title"] = title
 
-        return await self._process_text(text, metadata)
+        strategy = chunking or settings.CHUNKING_STRATEGY
+        if file_sha256:
+            unchanged = await self._unchanged_file(file_sha256, metadata, strategy)
+            if unchanged is not None:
+                return unchanged
+
+        report_progress(stage="parsing")
+        if file_path.lower().endswith(".pdf"):
+            result = await self._process_pdf(file_path, metadata, chunking, file_sha256)
+        else:
+            text = await parser_service.parse_file(file_path)
+            result = await self._process_text(text, metadata, chunking)
+        if file_sha256:
+            await document_store.aput_file(file_sha256, result["document_id"], strategy)
+        return result
+
+    async def _unchanged_file(
+        self, file_sha256: str, metadata: Dict[str, Any], strategy: str
+    ) -> Optional[Dict[str, Any]]:
+        """Result for a file already stored with the same contents and chunking, else None"""
+        known = await document_store.aget_file(file_sha256)
+        if not known or known["chunking"] != strategy:
+            return None
+        document_id = known["document_id"]
+        if metadata.get("document_id", document_id) != document_id:
+            return None
+        manifest = await document_store.aget_manifest(document_id)
+        if not manifest:
+            return None
+        logger.info(f"File {file_sha256[:12]} is already stored as document {document_id}")
+        result = {
+            "document_id": document_id,
+            "chunks_count": len(manifest),
+            "point_ids": list(manifest),
+            "chunks_embedded": 0,
+            "chunks_deleted": 0,
+            "status": "unchanged",
+        }
+        for key in ["title", "source", "filename"]:
+            if key in metadata:
+                result[key] = metadata[key]
+        return result
 
-    async def ingest_text(self, text: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def ingest_text(
+        self, text: str, metadata: Dict[str, Any] = None, chunking: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Ingest raw text"""
         metadata = metadata or {}
         metadata["source"] = "direct"
@@ -57,40 +229,206 @@ class IngestionService:
         if "title" not in metadata:
             # Use first 100 chars as title
             metadata["title"] = text[:100].replace('\n', ' ')[:50] + "..."
-        return await self._process_text(text, metadata)
+        return await self._process_text(text, metadata, chunking)
 
-    async def _process_text(self, text: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def _document_key(self, text: str, metadata: Dict[str, Any]) -> str:
+        """Stable identity of a document across re-ingestions"""
+        if metadata.get("url"):
+            return f"url:{metadata['url']}"
+        return f"sha256:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _document_id(self, document_key: str, metadata: Dict[str, Any]) -> str:
+        """Caller-supplied document ID, else one derived from the document key"""
+        return metadata.get("document_id") or str(uuid.uuid5(ID_NAMESPACE, document_key))
+
+    async def _process_text(
+        self, text: str, metadata: Dict[str, Any], chunking: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Process text through chunking, embedding, and storage"""
-        document_id = metadata.get("document_id") or str(uuid.uuid4())
+        chunks = self._chunker(chunking).chunk(text)
+        logger.info(f"Chunked text into {len(chunks)} chunks ({chunking or settings.CHUNKING_STRATEGY})")
+        return await self._store_chunks(self._document_key(text, metadata), metadata, self._aiter(chunks))
+
+    async def _process_pdf(
+        self,
+        file_path: str,
+        metadata: Dict[str, Any],
+        chunking: Optional[str] = None,
+        file_sha256: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Stream a PDF through chunking, embedding, and storage
+
+        Pages are extracted in parallel and chunked as they arrive, so the
+        first batches are embedded and stored while later pages are still
+        being parsed. Chunks record the pages they span. The full text is
+        never held, so the document is keyed by the file contents instead.
+        """
+        document_key = metadata.get("url") and f"url:{metadata['url']}"
+        if not document_key:
+            file_sha256 = file_sha256 or await asyncio.to_thread(self._file_sha256, file_path)
+            document_key = f"file-sha256:{file_sha256}"
+
+        chunker = self._chunker(chunking)
+        pages = parser_service.iter_pdf_pages(file_path)
+        if isinstance(chunker, SemanticChunker):
+            chunks = self._chunk_pages(chunker, pages)
+        else:
+            # Token and markdown chunking work on the whole text; extraction is still page-parallel
+            text = "\n".join([text async for _, text in pages]).strip()
+            chunks = self._aiter(chunker.chunk(text))
+        return await self._store_chunks(document_key, metadata, chunks)
+
+    async def _chunk_pages(
+        self, chunker: SemanticChunker, pages: AsyncIterator[Tuple[int, str]]
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Chunk a page stream, tagging each chunk with its first and last page"""
+        stream = chunker.stream()
+        page_starts: List[int] = []
+        page_numbers: List[int] = []
+
+        def tagged(spans):
+            for text, start, end in spans:
+                first = page_numbers[max(bisect_right(page_starts, start) - 1, 0)]
+                last = page_numbers[max(bisect_left(page_starts, end) - 1, 0)]
+                yield text, {"page_start": first, "page_end": last}
+
+        async for number, text in pages:
+            spans = stream.feed(text + "\n")
+            # Where the page's text starts once separators and whitespace are normalized
+            page_starts.append(stream.piece_start)
+            page_numbers.append(number)
+            report_progress(pages_parsed=len(page_numbers))
+            for item in tagged(spans):
+                yield item
+        for item in tagged(stream.close()):
+            yield item
+
+    @staticmethod
+    async def _aiter(chunks: Iterable[str]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        for chunk in chunks:
+            yield chunk, {}
+
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    async def _store_chunks(
+        self,
+        document_key: str,
+        metadata: Dict[str, Any],
+        chunks: AsyncIterator[Tuple[str, Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Embed and store chunks as they are produced
+
+        Point IDs are derived from (document, chunk hash), so re-ingesting a
+        document only embeds and upserts chunks that are new, and deletes
+        chunks that no longer exist. Re-ingesting with another chunking
+        strategy therefore replaces the old chunks.
+        """
+        explicit_id = metadata.get("document_id")
+        document_id = self._document_id(document_key, metadata)
         metadata["document_id"] = document_id
+        metadata["timestamp"] = metadata.get("timestamp") or datetime.now(timezone.utc).isoformat()
 
-        # Chunk text
-        chunks = self.chunker.chunk(text)
-        logger.info(f"Chunked text into {len(chunks)} chunks")
+        manifest = await document_store.aget_manifest(document_id)
+        if not manifest and explicit_id:
+            # Caller-supplied IDs may predate the manifest; fall back to what Qdrant holds
+            manifest = {pid: "" for pid in await qdrant_service.get_document_point_ids(document_id)}
 
-        # Generate embeddings
-        embeddings = await embedding_service.embed_texts(chunks)
-        logger.info(f"Generated {len(embeddings)} embeddings")
+        # Embed and store in upsert-sized batches so storage starts as soon as
+        # the first embeddings arrive instead of after the whole document;
+        # a bounded number of batches in flight pushes back on the producer
+        batch_size = settings.QDRANT_UPSERT_BATCH_SIZE
+        wait = settings.QDRANT_UPSERT_WAIT
+        slots = asyncio.Semaphore(settings.INGEST_MAX_INFLIGHT_BATCHES)
 
-        # Prepare chunks for Qdrant
-        chunk_data = [
-            {
-                "text": chunk,
-                "embedding": emb,
-                **metadata,
-            }
-            for chunk, emb in zip(chunks, embeddings)
-        ]
+        stored = 0
 
-        # Store in Qdrant
-        point_ids = await qdrant_service.upsert_chunks(chunk_data)
-        logger.info(f"Stored {len(point_ids)} chunks in Qdrant")
+        async def embed_and_store(batch: List[Tuple[str, str, str, Dict[str, Any]]]) -> List[str]:
+            nonlocal stored
+            try:
+                embeddings = await embedding_service.embed_texts([chunk for _, _, chunk, _ in batch])
+                chunk_data = [
+                    {
+                        **metadata,
+                        **extra,
+                        "text": chunk,
+                        "embedding": emb,
+                        "point_id": point_id,
+                        "chunk_hash": chunk_hash,
+                    }
+                    for (point_id, chunk_hash, chunk, extra), emb in zip(batch, embeddings)
+                ]
+                ids = await qdrant_service.upsert_chunks(chunk_data, wait=wait)
+                stored += len(ids)
+                report_progress(chunks_stored=stored)
+                return ids
+            finally:
+                slots.release()
+
+        # Derive deterministic point IDs; repeated chunks are told apart by occurrence
+        occurrences = Counter()
+        entries: List[Tuple[str, str]] = []
+        pending: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        tasks: List[asyncio.Future] = []
+        embedded = 0
+
+        async def flush():
+            nonlocal pending
+            report_progress(stage="embedding", chunks=len(entries), chunks_to_embed=embedded)
+            await slots.acquire()
+            tasks.append(asyncio.ensure_future(embed_and_store(pending)))
+            pending = []
+
+        try:
+            async for chunk, extra in chunks:
+                chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+                occurrences[chunk_hash] += 1
+                point_id = str(uuid.uuid5(ID_NAMESPACE, f"{document_id}:{chunk_hash}:{occurrences[chunk_hash]}"))
+                entries.append((point_id, chunk_hash))
+                if point_id not in manifest:
+                    pending.append((point_id, chunk_hash, chunk, extra))
+                    embedded += 1
+                    if len(pending) >= batch_size:
+                        await flush()
+            if pending:
+                await flush()
+            report_progress(stage="embedding", chunks=len(entries), chunks_to_embed=embedded)
+            batch_ids = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        stored_ids = [point_id for ids in batch_ids for point_id in ids]
+
+        current_ids = {point_id for point_id, _ in entries}
+        removed_ids = [pid for pid in manifest if pid not in current_ids]
+        logger.info(
+            f"Document {document_id}: {embedded} new, "
+            f"{len(entries) - embedded} unchanged, {len(removed_ids)} removed chunks"
+        )
+
+        if not wait:
+            await qdrant_service.confirm_points(stored_ids)
+        await qdrant_service.delete_points(removed_ids)
+        await document_store.areplace_manifest(document_id, entries)
+        await document_store.aupsert_document({**metadata, "chunk_count": len(entries)})
+        if embedded or removed_ids:
+            answer_cache.invalidate_documents([document_id])
+        point_ids = [point_id for point_id, _ in entries]
+        logger.info(f"Stored {len(stored_ids)} chunks in Qdrant")
 
         # Return metadata in response
         result = {
             "document_id": document_id,
-            "chunks_count": len(chunks),
+            "chunks_count": len(entries),
             "point_ids": point_ids,
+            "chunks_embedded": embedded,
+            "chunks_deleted": len(removed_ids),
             "status": "success",
         }
         # Add metadata fields
@@ -100,5 +438,60 @@ class IngestionService:
 
         return result
 
+    async def delete_document(self, document_id: str) -> int:
+        """Delete a document's chunks, manifest and catalog entry"""
+        result = await self.delete_documents(document_ids=[document_id])
+        return result["deleted_count"]
+
+    async def delete_documents(
+        self,
+        document_ids: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        older_than: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """Bulk delete documents matching all given criteria
+
+        Criteria are resolved against the catalog, and Qdrant deletes exactly
+        those documents by ID. Chunk payloads are not used for matching:
+        unchanged chunks keep the timestamp of the ingest that embedded them.
+        """
+        cutoff = None
+        if older_than is not None:
+            if older_than.tzinfo is None:
+                older_than = older_than.replace(tzinfo=timezone.utc)
+            cutoff = older_than.astimezone(timezone.utc).isoformat()
+
+        matched = await document_store.afind_documents(
+            document_ids=document_ids, source=source, older_than=cutoff
+        )
+        deleted_ids = list(matched)
+        if document_ids and not (source or cutoff):
+            # Explicit IDs alone are deleted even if the catalog never knew them
+            deleted_ids = list(set(matched) | set(document_ids))
+        if deleted_ids:
+            await qdrant_service.delete_documents(deleted_ids)
+        await document_store.adelete_documents(deleted_ids)
+        answer_cache.invalidate_documents(deleted_ids)
+
+        logger.info(f"Deleted {len(matched)} documents with {sum(matched.values())} chunks")
+        return {
+            "documents_deleted": len(matched),
+            "deleted_count": sum(matched.values()),
+        }
+
+    async def sync_catalog(self):
+        """Backfill the document catalog from Qdrant when it is empty
+
+        Collections populated before the catalog existed are scanned once;
+        afterwards the catalog is maintained on ingest and delete.
+        """
+        if await document_store.acount_documents() > 0:
+            return
+        documents = await qdrant_service.get_all_documents()
+        for document in documents:
+            await document_store.aupsert_document(document)
+        if documents:
+            logger.info(f"Backfilled document catalog with {len(documents)} documents")
+
 
 ingestion_service = IngestionService()
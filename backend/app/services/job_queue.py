@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.progress import progress_reporter
+from app.services.ingestion_service import ingestion_service
+from app.storage.job_store import JobStore, job_store
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = {"url", "text", "file"}
+
+
+class JobQueue:
+    """Runs ingestion jobs in the background on a fixed pool of workers
+
+    The API only records a job and returns its ID, so request latency no
+    longer depends on how long a document takes to ingest, and
+    JOB_WORKERS bounds how many documents are ingested at once. Live
+    progress is kept in memory and persisted when the job finishes.
+    """
+
+    def __init__(self, store: JobStore, workers: int):
+        self.store = store
+        self.workers = max(1, workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._closing = False
+
+    async def start(self):
+        """Recover jobs left over from the last run and start the workers"""
+        self._closing = False
+        self._queue = asyncio.Queue()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=settings.JOB_RETENTION_DAYS)).isoformat()
+        await asyncio.to_thread(self.store.prune, cutoff)
+        queued, abandoned = await asyncio.to_thread(self.store.recover, settings.JOB_MAX_ATTEMPTS)
+        for job in abandoned:
+            self._discard_upload(job)
+        for job_id in queued:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers, {self._queue.qsize()} jobs pending")
+
+    async def close(self):
+        """Stop the workers; jobs still running are resumed on the next start"""
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a job and queue it for the workers"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = await self.store.acreate(kind, payload)
+        if self._queue is not None:
+            self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self.store.aget(job_id)
+        return self._with_live_progress(job) if job else None
+
+    async def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return [self._with_live_progress(job) for job in await self.store.alist(status, limit)]
+
+    def _with_live_progress(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if job["job_id"] in self._progress:
+            job["progress"] = dict(self._progress[job["job_id"]])
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                if self._closing:
+                    raise
+                logger.error(f"Job {job_id} was cancelled while being claimed or recorded")
+            except Exception as e:
+                logger.error(f"Job {job_id} could not be run: {str(e)}")
+
+    async def _run(self, job_id: str):
+        if not await self.store.aclaim(job_id):
+            return
+        job = await self.store.aget(job_id)
+        progress = self._progress[job_id] = {"stage": "started"}
+        logger.info(f"Running {job['kind']} ingestion job {job_id} (attempt {job['attempts']})")
+        try:
+            with progress_reporter(progress.update):
+                result = await self._execute(job)
+        except asyncio.CancelledError:
+            if self._closing:
+                # Shutting down: leave the job running so the next start requeues it
+                self._progress.pop(job_id, None)
+                raise
+            # Cancelled from inside the job: fail it and keep this worker
+            logger.error(f"Ingestion job {job_id} was cancelled")
+            await self.store.afinish(job_id, "failed", progress, error="Cancelled")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            await self.store.afinish(job_id, "failed", progress, error=str(e))
+        else:
+            result.pop("point_ids", None)
+            progress["stage"] = "done"
+            await self.store.afinish(job_id, "succeeded", progress, result=result)
+        self._progress.pop(job_id, None)
+        self._discard_upload(job)
+
+    async def _execute(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        payload = job["payload"]
+        metadata = payload.get("metadata") or {}
+        chunking = payload.get("chunking")
+        if job["kind"] == "url":
+            return await ingestion_service.ingest_url(payload["url"], metadata, chunking)
+        if job["kind"] == "text":
+            return await ingestion_service.ingest_text(payload["text"], metadata, chunking)
+        return await ingestion_service.ingest_file(payload["path"], metadata, chunking, payload.get("sha256"))
+
+    @staticmethod
+    def _discard_upload(job: Dict[str, Any]):
+        """Remove the stored upload of a finished file job"""
+        path = job["payload"].get("path") if job["kind"] == "file" else None
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+
+job_queue = JobQueue(job_store, settings.JOB_WORKERS)
@@ -1,12 +1,18 @@
-from typing import Optional
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import asyncio
+import hashlib
 import httpx
-from bs4 import BeautifulSoup
 import logging
-import PyPDF2
-import docx
 import google.generativeai as genai
 from PIL import Image
 from app.core.config import settings
+from app.core.extractors import (
+    extract_docx, extract_html, extract_html_file, extract_pdf_pages, extract_txt, pdf_page_count,
+)
+from app.core.parse_pool import ParsePool
+from app.core.progress import report_progress
 
 logger = logging.getLogger(__name__)
 
@@ -25,50 +31,114 @@ class ParserService:
         # Configure Gemini for image OCR
         if settings.GEMINI_API_KEY:
             genai.configure(api_key=settings.GEMINI_API_KEY)
-
-    async def fetch_webpage(self, url: str) -> tuple[str, str]:
-        """Fetch and extract text from a webpage
-
-        Returns:
-            tuple: (text_content, title)
+        self.pool = ParsePool(
+            max_workers=settings.PARSE_WORKERS,
+            concurrency=settings.PARSE_CONCURRENCY,
+            timeout=settings.PARSE_TIMEOUT_SECONDS,
+            memory_limit_mb=settings.PARSE_MEMORY_LIMIT_MB,
+        )
+        self.client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazy initialization of the shared HTTP client
+
+        One client serves every fetch, so connections to a host are kept
+        alive and reused (multiplexed over HTTP/2 where the server supports it).
         """
-        try:
-            async with httpx.AsyncClient(timeout=30.0, headers=DEFAULT_HEADERS) as client:
-                response = await client.get(url)
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=settings.HTTP_TIMEOUT,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                http2=settings.HTTP2_ENABLED,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+                ),
+            )
+        return self.client
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Limit concurrent requests to one host to HTTP_MAX_CONNECTIONS_PER_HOST"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._host_slots = {}
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+        return self._host_slots[host]
+
+    async def close(self):
+        """Close pooled HTTP connections and stop the parse worker processes"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        self.pool.close()
+
+    async def fetch_page(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and extract a webpage, revalidating against ``cached`` validators
+
+        Returns None when the server answers 304 Not Modified or the body is
+        byte-identical to the cached one; otherwise a dict with ``text``,
+        ``title``, any ``author``/``published`` found in the page, and the
+        ``etag``/``last_modified``/``body_hash`` to cache
+        once the page has been ingested. Bodies over HTTP_MAX_RESPONSE_BYTES
+        are aborted mid-download.
+        """
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self._host_slot(url):
+            async with self._get_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    logger.info(f"Not modified since last ingest: {url}")
+                    return None
                 response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Extract title
-            title = soup.find('title')
-            if title and title.text.strip():
-                title_text = title.text.strip()
-            else:
-                # Use URL as fallback
-                from urllib.parse import urlparse
-                parsed = urlparse(url)
-                title_text = parsed.netloc if parsed.netloc else url.split('/')[-1] or url
-
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-
-            # Get text
-            text = soup.get_text()
-
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-
-            return text, title_text
-
-        except Exception as e:
-            logger.error(f"Error fetching webpage {url}: {str(e)}")
-            # Return URL as fallback if fetch fails
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            return url, parsed.netloc if parsed.netloc else url.split('/')[-1] or url
+                content = await self._read_capped(response, url)
+                etag = response.headers.get("etag", "")
+                last_modified = response.headers.get("last-modified", "")
+
+        body_hash = hashlib.sha256(content).hexdigest()
+        if cached and cached.get("body_hash") == body_hash:
+            logger.info(f"Unchanged body since last ingest: {url}")
+            return None
+
+        extracted = await self.pool.run("html", extract_html, content, url, settings.HTML_EXTRACTOR)
+        return {
+            **extracted,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+        }
+
+    async def fetch_bytes(self, url: str) -> bytes:
+        """GET a raw resource (robots.txt, sitemaps) through the shared client, size-capped"""
+        async with self._host_slot(url):
+            async with self._get_client().stream("GET", url) as response:
+                response.raise_for_status()
+                return await self._read_capped(response, url)
+
+    async def _read_capped(self, response: httpx.Response, url: str) -> bytes:
+        """Read a streamed body, aborting once it exceeds HTTP_MAX_RESPONSE_BYTES"""
+        limit = settings.HTTP_MAX_RESPONSE_BYTES
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            raise ValueError(f"Response from {url} is {declared} bytes, over the {limit} byte limit")
+        parts = []
+        size = 0
+        async for part in response.aiter_bytes():
+            size += len(part)
+            if size > limit:
+                raise ValueError(f"Response from {url} exceeds the {limit} byte limit")
+            parts.append(part)
+        return b"".join(parts)
 
     async def parse_file(self, file_path: str) -> str:
         """Parse text from various file formats"""
@@ -76,11 +146,13 @@ class ParserService:
 
         try:
             if file_path_lower.endswith('.pdf'):
-                return self._parse_pdf(file_path)
+                return await self._parse_pdf(file_path)
             elif file_path_lower.endswith('.docx'):
-                return self._parse_docx(file_path)
+                return await self._parse_docx(file_path)
             elif file_path_lower.endswith(('.txt', '.md')):
-                return self._parse_txt(file_path)
+                return await self._parse_txt(file_path)
+            elif file_path_lower.endswith(('.html', '.htm')):
+                return await self._parse_html(file_path)
             elif file_path_lower.endswith(('.png', '.jpg', '.jpeg', '.webp', '.gif')):
                 return await self._parse_image(file_path)
             else:
@@ -89,27 +161,58 @@ class ParserService:
             logger.error(f"Error parsing file {file_path}: {str(e)}")
             raise
 
-    def _parse_pdf(self, file_path: str) -> str:
+    async def _parse_pdf(self, file_path: str) -> str:
         """Extract text from PDF"""
-        text = ""
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
-
-    def _parse_docx(self, file_path: str) -> str:
+        pages = [text async for _, text in self.iter_pdf_pages(file_path)]
+        return "\n".join(pages).strip()
+
+    async def iter_pdf_pages(self, file_path: str) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page number, text) in order while later pages are still being extracted
+
+        Page ranges of PARSE_PDF_PAGES_PER_JOB pages are extracted in parallel
+        workers. Only a few ranges run ahead of the consumer, so memory stays
+        bounded however large the document is.
+        """
+        page_count = await self.pool.run("pdf", pdf_page_count, file_path)
+        report_progress(pages=page_count)
+        step = max(1, settings.PARSE_PDF_PAGES_PER_JOB)
+        ranges = iter(range(0, page_count, step))
+        # One range more than can run at once keeps the workers busy while the consumer catches up
+        lookahead = settings.PARSE_CONCURRENCY.get("pdf", 1) + 1
+        pending = deque()
+
+        def schedule():
+            start = next(ranges, None)
+            if start is not None:
+                stop = min(start + step, page_count)
+                pending.append((start, asyncio.ensure_future(
+                    self.pool.run("pdf", extract_pdf_pages, file_path, start, stop)
+                )))
+
+        try:
+            for _ in range(lookahead):
+                schedule()
+            while pending:
+                start, task = pending.popleft()
+                texts = await task
+                schedule()
+                for i, text in enumerate(texts):
+                    yield start + i + 1, text
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _parse_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
-        doc = docx.Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        return await self.pool.run("docx", extract_docx, file_path)
 
-    def _parse_txt(self, file_path: str) -> str:
+    async def _parse_txt(self, file_path: str) -> str:
         """Extract text from TXT or MD"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
+        return await self.pool.run("txt", extract_txt, file_path)
+
+    async def _parse_html(self, file_path: str) -> str:
+        """Extract text from a saved HTML page"""
+        return await self.pool.run("html", extract_html_file, file_path, settings.HTML_EXTRACTOR)
 
     async def _parse_image(self, file_path: str) -> str:
         """Extract text from image using Gemini Vision"""
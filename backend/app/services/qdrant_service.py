@@ -1,12 +1,34 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PointIdsList, Filter, FieldCondition, MatchValue, MatchAny,
+    PayloadSchemaType, SparseVectorParams, SparseVector, Modifier, Prefetch, FusionQuery, Fusion,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled, VectorParamsDiff, SearchParams, QuantizationSearchParams,
+)
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
+from app.core.sparse import BM25SparseEncoder
+import asyncio
+import httpx
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Payload fields used in filters; indexed so filtered deletes and scrolls don't scan the collection
+PAYLOAD_INDEXES = {
+    "document_id": PayloadSchemaType.KEYWORD,
+    "source": PayloadSchemaType.KEYWORD,
+    "url": PayloadSchemaType.KEYWORD,
+    "timestamp": PayloadSchemaType.DATETIME,
+}
+
+# Document IDs per filtered delete request
+DELETE_BATCH_SIZE = 1000
+
+# Named sparse vector holding BM25 term weights next to the (unnamed) dense vector
+SPARSE_VECTOR_NAME = "bm25"
+
 
 class QdrantService:
     """Vector database operations using Qdrant"""
@@ -14,85 +36,283 @@ class QdrantService:
     def __init__(self):
         self.client = None
         self.collection_name = settings.QDRANT_COLLECTION_NAME
+        self._upsert_slots = asyncio.Semaphore(settings.QDRANT_UPSERT_PARALLELISM)
+        self.sparse_encoder = BM25SparseEncoder(
+            k1=settings.BM25_K1,
+            b=settings.BM25_B,
+            avg_doc_tokens=settings.BM25_AVG_DOC_TOKENS,
+        )
+        # Set by initialize_collection once the collection is known to have a sparse vector
+        self.hybrid_enabled = False
+
+    def _get_client(self) -> AsyncQdrantClient:
+        """Lazy initialization of the async Qdrant client
 
-    def _get_client(self) -> QdrantClient:
-        """Lazy initialization of Qdrant client"""
+        A single client is shared by all requests; its REST transport keeps a
+        pool of keep-alive connections, and the gRPC transport (opt-in via
+        QDRANT_PREFER_GRPC) multiplexes requests over one channel.
+        """
         if self.client is None:
-            self.client = QdrantClient(
+            self.client = AsyncQdrantClient(
                 host=settings.QDRANT_HOST,
                 port=settings.QDRANT_PORT,
+                grpc_port=settings.QDRANT_GRPC_PORT,
+                prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                timeout=settings.QDRANT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.QDRANT_MAX_CONNECTIONS,
+                ),
             )
+            transport = "gRPC" if settings.QDRANT_PREFER_GRPC else "REST"
+            logger.info(f"Initialized async Qdrant client ({transport})")
         return self.client
 
+    async def close(self):
+        """Close pooled connections"""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
     async def initialize_collection(self, vector_size: int = 768):
         """Create collection if it doesn't exist"""
         client = self._get_client()
-        collections = client.get_collections().collections
+        collections = (await client.get_collections()).collections
         collection_names = [c.name for c in collections]
 
         if self.collection_name not in collection_names:
-            client.create_collection(
+            await client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                vectors_config=VectorParams(
+                    size=vector_size,
+                    distance=Distance.COSINE,
+                    on_disk=settings.QDRANT_ON_DISK_VECTORS,
+                ),
+                sparse_vectors_config={SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+                quantization_config=self._quantization_config(),
             )
             logger.info(f"Created collection: {self.collection_name} with vector size {vector_size}")
+            self.hybrid_enabled = settings.HYBRID_SEARCH_ENABLED
         else:
             # Get existing collection info to check vector size
-            collection_info = client.get_collection(self.collection_name)
+            collection_info = await client.get_collection(self.collection_name)
             existing_size = collection_info.config.params.vectors.size
             logger.info(f"Collection already exists: {self.collection_name} with vector size {existing_size}")
 
+            has_sparse = SPARSE_VECTOR_NAME in (collection_info.config.params.sparse_vectors or {})
+            self.hybrid_enabled = settings.HYBRID_SEARCH_ENABLED and has_sparse
+            if settings.HYBRID_SEARCH_ENABLED and not has_sparse:
+                logger.warning(
+                    f"Collection {self.collection_name} has no '{SPARSE_VECTOR_NAME}' sparse vector; "
+                    f"hybrid search is disabled. Recreate the collection and re-ingest to enable it."
+                )
+
             if existing_size != vector_size:
                 logger.warning(
                     f"Vector size mismatch! Requested {vector_size} but collection has {existing_size}. "
                     f"Delete and recreate collection to change embedding model."
                 )
 
-    async def upsert_chunks(self, chunks: List[Dict[str, Any]]) -> List[str]:
-        """Insert text chunks with embeddings into Qdrant"""
+            await self._migrate_storage(collection_info)
+
+        await self._ensure_payload_indexes()
+
+    def _quantization_config(self):
+        """Quantization config for QDRANT_QUANTIZATION (quantized vectors stay in RAM)"""
+        if settings.QDRANT_QUANTIZATION == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if settings.QDRANT_QUANTIZATION == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    async def _migrate_storage(self, collection_info):
+        """Bring an existing collection's quantization and on-disk settings in line with config
+
+        Qdrant applies the change in place and rebuilds quantized data in the
+        background, so no re-ingestion is needed.
+        """
+        client = self._get_client()
+        current = collection_info.config.quantization_config
+        if isinstance(current, ScalarQuantization):
+            current_mode = "scalar"
+        elif isinstance(current, BinaryQuantization):
+            current_mode = "binary"
+        else:
+            current_mode = "none"
+        current_on_disk = bool(collection_info.config.params.vectors.on_disk)
+
+        changes = {}
+        if current_mode != settings.QDRANT_QUANTIZATION:
+            changes["quantization_config"] = self._quantization_config() or Disabled.DISABLED
+        if current_on_disk != settings.QDRANT_ON_DISK_VECTORS:
+            changes["vectors_config"] = {"": VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS)}
+        if not changes:
+            return
+
+        await client.update_collection(collection_name=self.collection_name, **changes)
+        logger.info(
+            f"Migrating collection {self.collection_name}: quantization {current_mode} -> "
+            f"{settings.QDRANT_QUANTIZATION}, on_disk {current_on_disk} -> {settings.QDRANT_ON_DISK_VECTORS}"
+        )
+
+    def _search_params(self, oversampling: Optional[float] = None) -> Optional[SearchParams]:
+        """Rescore quantized candidates against the original vectors"""
+        if settings.QDRANT_QUANTIZATION == "none":
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=settings.QDRANT_SEARCH_RESCORE,
+                oversampling=oversampling or settings.QDRANT_SEARCH_OVERSAMPLING,
+            )
+        )
+
+    async def _ensure_payload_indexes(self):
+        """Create missing payload indexes on filterable fields"""
         client = self._get_client()
-        points = []
+        collection_info = await client.get_collection(self.collection_name)
+        existing = collection_info.payload_schema or {}
+
+        for field_name, schema in PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            await client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=schema,
+                wait=True,
+            )
+            logger.info(f"Created {schema.value} payload index on {field_name}")
+
+    def _build_point(self, chunk: Dict[str, Any]) -> PointStruct:
+        """Convert a chunk dict into a Qdrant point, adding BM25 weights when hybrid search is on"""
+        vector = chunk["embedding"]
+        if self.hybrid_enabled:
+            indices, values = self.sparse_encoder.encode_document(chunk["text"])
+            vector = {"": vector, SPARSE_VECTOR_NAME: SparseVector(indices=indices, values=values)}
+
+        payload = {
+            "text": chunk["text"],
+            "source": chunk.get("source", ""),
+            "title": chunk.get("title", ""),
+            "url": chunk.get("url", ""),
+            "author": chunk.get("author", ""),
+            "timestamp": chunk.get("timestamp", ""),
+            "document_id": chunk.get("document_id", ""),
+            "chunk_hash": chunk.get("chunk_hash", ""),
+        }
+        # Optional fields: pages a PDF chunk spans, publication date of web articles
+        for key in ("page_start", "page_end", "published"):
+            if key in chunk:
+                payload[key] = chunk[key]
+
+        return PointStruct(id=chunk["point_id"], vector=vector, payload=payload)
+
+    async def _upsert_batch(self, chunks: List[Dict[str, Any]], wait: bool):
+        """Send one batch, limited to QDRANT_UPSERT_PARALLELISM batches in flight"""
+        async with self._upsert_slots:
+            client = self._get_client()
+            # Points are built per batch so the whole document is never materialized at once
+            await client.upsert(
+                collection_name=self.collection_name,
+                points=[self._build_point(chunk) for chunk in chunks],
+                wait=wait,
+            )
+
+    async def upsert_chunks(self, chunks: List[Dict[str, Any]], wait: Optional[bool] = None) -> List[str]:
+        """Insert text chunks with embeddings into Qdrant
+
+        Chunks are sent in batches of QDRANT_UPSERT_BATCH_SIZE with several
+        batches in flight. With ``wait=False`` Qdrant acknowledges each batch
+        before indexing it; use ``confirm_points`` to wait for the writes.
+        """
+        wait = settings.QDRANT_UPSERT_WAIT if wait is None else wait
+        batch_size = settings.QDRANT_UPSERT_BATCH_SIZE
         point_ids = []
 
         for chunk in chunks:
-            point_id = str(uuid.uuid4())
-            point_ids.append(point_id)
-
-            points.append(
-                PointStruct(
-                    id=point_id,
-                    vector=chunk["embedding"],
-                    payload={
-                        "text": chunk["text"],
-                        "source": chunk.get("source", ""),
-                        "title": chunk.get("title", ""),
-                        "url": chunk.get("url", ""),
-                        "author": chunk.get("author", ""),
-                        "timestamp": chunk.get("timestamp", ""),
-                        "document_id": chunk.get("document_id", ""),
-                    },
-                )
-            )
+            chunk["point_id"] = chunk.get("point_id") or str(uuid.uuid4())
+            point_ids.append(chunk["point_id"])
 
-        client.upsert(
-            collection_name=self.collection_name,
-            points=points,
-        )
+        await asyncio.gather(*(
+            self._upsert_batch(chunks[i:i + batch_size], wait)
+            for i in range(0, len(chunks), batch_size)
+        ))
 
-        logger.info(f"Upserted {len(points)} chunks to Qdrant")
+        logger.info(f"Upserted {len(point_ids)} chunks to Qdrant (wait={wait})")
         return point_ids
 
-    async def search(self, query_vector: List[float], limit: int = None) -> List[Dict[str, Any]]:
-        """Search for similar chunks"""
+    async def confirm_points(self, point_ids: List[str], timeout: float = 60.0, interval: float = 0.2):
+        """Wait until points written with ``wait=False`` are visible in the collection"""
+        client = self._get_client()
+        pending = list(point_ids)
+        deadline = asyncio.get_running_loop().time() + timeout
+
+        while pending:
+            found = set()
+            for i in range(0, len(pending), 1000):
+                records = await client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=pending[i:i + 1000],
+                    with_payload=False,
+                    with_vectors=False,
+                )
+                found.update(str(r.id) for r in records)
+            pending = [pid for pid in pending if pid not in found]
+            if not pending:
+                break
+            if asyncio.get_running_loop().time() > deadline:
+                raise TimeoutError(f"{len(pending)} points not confirmed after {timeout}s")
+            await asyncio.sleep(interval)
+
+        logger.info(f"Confirmed {len(point_ids)} points in Qdrant")
+
+    async def search(
+        self,
+        query_vector: List[float],
+        limit: int = None,
+        query_text: Optional[str] = None,
+        oversampling: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search for similar chunks
+
+        With ``query_text`` and hybrid search enabled, dense and BM25 candidates
+        are fetched and fused with reciprocal-rank fusion in a single request.
+        On quantized collections, ``oversampling`` (default
+        QDRANT_SEARCH_OVERSAMPLING) controls how many extra candidates are
+        rescored with the original vectors.
+        """
         client = self._get_client()
         limit = limit or settings.TOP_K_RESULTS
+        search_params = self._search_params(oversampling)
 
-        results = client.search(
-            collection_name=self.collection_name,
-            query_vector=query_vector,
-            limit=limit,
-            with_payload=True,
-        )
+        indices, values = self.sparse_encoder.encode_query(query_text) if query_text else ([], [])
+        if self.hybrid_enabled and indices:
+            candidates = limit * settings.HYBRID_PREFETCH_MULTIPLIER
+            response = await client.query_points(
+                collection_name=self.collection_name,
+                prefetch=[
+                    Prefetch(query=query_vector, limit=candidates, params=search_params),
+                    Prefetch(
+                        query=SparseVector(indices=indices, values=values),
+                        using=SPARSE_VECTOR_NAME,
+                        limit=candidates,
+                    ),
+                ],
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=limit,
+                with_payload=True,
+            )
+            results = response.points
+        else:
+            results = await client.search(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                limit=limit,
+                search_params=search_params,
+                with_payload=True,
+            )
 
         return [
             {
@@ -103,57 +323,96 @@ class QdrantService:
                 "title": r.payload.get("title", ""),
                 "url": r.payload.get("url", ""),
                 "document_id": r.payload.get("document_id", ""),
+                "page_start": r.payload.get("page_start"),
+                "page_end": r.payload.get("page_end"),
             }
             for r in results
         ]
 
-    async def delete_document(self, document_id: str) -> int:
+    async def delete_documents(self, document_ids: List[str]):
+        """Delete all chunks of the given documents, DELETE_BATCH_SIZE documents per request"""
+        client = self._get_client()
+        for start in range(0, len(document_ids), DELETE_BATCH_SIZE):
+            batch = document_ids[start:start + DELETE_BATCH_SIZE]
+            await client.delete(
+                collection_name=self.collection_name,
+                points_selector=Filter(must=[FieldCondition(key="document_id", match=MatchAny(any=batch))]),
+            )
+        logger.info(f"Deleted chunks of {len(document_ids)} documents")
+
+    async def delete_document(self, document_id: str):
         """Delete all chunks associated with a document"""
+        await self.delete_documents([document_id])
+        logger.info(f"Deleted document {document_id}")
+
+    async def delete_points(self, point_ids: List[str]) -> int:
+        """Delete specific points by ID"""
+        if not point_ids:
+            return 0
         client = self._get_client()
-        # First count how many points will be deleted
-        count_result = client.count(
+        await client.delete(
             collection_name=self.collection_name,
-            count_filter=Filter(
-                must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]
-            ),
+            points_selector=PointIdsList(points=point_ids),
         )
-        deleted_count = count_result.count
+        logger.info(f"Deleted {len(point_ids)} points")
+        return len(point_ids)
 
-        # Then delete the points
-        client.delete(
-            collection_name=self.collection_name,
-            points_selector=Filter(
-                must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]
-            ),
-        )
-        logger.info(f"Deleted document {document_id} with {deleted_count} chunks")
-        return deleted_count
+    async def get_document_point_ids(self, document_id: str) -> List[str]:
+        """List the IDs of all points belonging to a document"""
+        client = self._get_client()
+        point_ids = []
+        offset = None
+
+        while True:
+            records, offset = await client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))]
+                ),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            point_ids.extend(str(r.id) for r in records)
+            if offset is None:
+                break
+
+        return point_ids
 
     async def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all unique documents from the collection"""
+        """Scan the collection for unique documents and their chunk counts
+
+        This reads every point, so it is only used to backfill the document
+        catalog; listing documents goes through the catalog.
+        """
         client = self._get_client()
-        # Scroll through all points and extract unique document_ids
         documents = {}
         offset = None
 
         while True:
-            records, offset = client.scroll(
+            records, offset = await client.scroll(
                 collection_name=self.collection_name,
-                limit=100,
+                limit=1000,
                 offset=offset,
-                with_payload=True,
+                with_payload=["document_id", "title", "url", "source", "timestamp"],
+                with_vectors=False,
             )
 
             for record in records:
                 doc_id = record.payload.get("document_id")
-                if doc_id and doc_id not in documents:
+                if not doc_id:
+                    continue
+                if doc_id not in documents:
                     documents[doc_id] = {
-                        "id": doc_id,
+                        "document_id": doc_id,
                         "title": record.payload.get("title", ""),
                         "url": record.payload.get("url", ""),
                         "source": record.payload.get("source", ""),
                         "timestamp": record.payload.get("timestamp", ""),
+                        "chunk_count": 0,
                     }
+                documents[doc_id]["chunk_count"] += 1
 
             if offset is None:
                 break
@@ -0,0 +1 @@
+# Local SQLite sidecars
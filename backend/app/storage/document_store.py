@@ -0,0 +1,234 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.storage.sqlite import SQLiteStore
+import asyncio
+import base64
+import json
+
+
+CATALOG_COLUMNS = ["document_id", "title", "source", "url", "timestamp", "chunk_count"]
+SORTABLE_COLUMNS = {"timestamp", "title", "chunk_count"}
+
+
+def _encode_cursor(value: Any, document_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, document_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return value, document_id
+
+
+class DocumentStore(SQLiteStore):
+    """Local SQLite sidecar holding the document catalog and chunk manifests
+
+    The catalog has one row per document so listing documents never touches
+    Qdrant. The manifest maps each document to the deterministic point IDs
+    of its chunks and their content hashes, so re-ingestion can diff against
+    what is already stored in Qdrant. Uploaded files are also recorded by
+    content hash, so an identical upload is recognised before it is parsed.
+    """
+
+    NAME = "document store"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS chunk_manifest ("
+        "document_id TEXT NOT NULL, point_id TEXT NOT NULL, chunk_hash TEXT NOT NULL, "
+        "PRIMARY KEY (document_id, point_id))",
+        "CREATE TABLE IF NOT EXISTS documents ("
+        "document_id TEXT PRIMARY KEY, title TEXT NOT NULL DEFAULT '', "
+        "source TEXT NOT NULL DEFAULT '', url TEXT NOT NULL DEFAULT '', "
+        "timestamp TEXT NOT NULL DEFAULT '', chunk_count INTEGER NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS files ("
+        "sha256 TEXT PRIMARY KEY, document_id TEXT NOT NULL, chunking TEXT NOT NULL DEFAULT '')",
+        "CREATE INDEX IF NOT EXISTS idx_files_document_id ON files(document_id)",
+        *(
+            f"CREATE INDEX IF NOT EXISTS idx_documents_{column} ON documents({column}, document_id)"
+            for column in sorted(SORTABLE_COLUMNS | {"source", "url"})
+        ),
+    )
+
+    def get_manifest(self, document_id: str) -> Dict[str, str]:
+        """Return {point_id: chunk_hash} for a document"""
+        with self._lock:
+            rows = self._get_conn().execute(
+                "SELECT point_id, chunk_hash FROM chunk_manifest WHERE document_id = ?",
+                (document_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def replace_manifest(self, document_id: str, entries: List[Tuple[str, str]]):
+        """Replace a document's manifest with (point_id, chunk_hash) entries"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute("DELETE FROM chunk_manifest WHERE document_id = ?", (document_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_manifest (document_id, point_id, chunk_hash) VALUES (?, ?, ?)",
+                    [(document_id, point_id, chunk_hash) for point_id, chunk_hash in entries],
+                )
+
+    def get_file(self, sha256: str) -> Optional[Dict[str, str]]:
+        """Return {document_id, chunking} for a file ingested with this content hash"""
+        with self._lock:
+            row = self._get_conn().execute(
+                "SELECT document_id, chunking FROM files WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return {"document_id": row[0], "chunking": row[1]} if row else None
+
+    def put_file(self, sha256: str, document_id: str, chunking: str):
+        """Remember which document a file's contents were ingested as"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (sha256, document_id, chunking) VALUES (?, ?, ?)",
+                    (sha256, document_id, chunking),
+                )
+
+    def upsert_document(self, document: Dict[str, Any]):
+        """Insert or update a catalog entry"""
+        row = [document.get(column) or ("" if column != "chunk_count" else 0) for column in CATALOG_COLUMNS]
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO documents ({', '.join(CATALOG_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(CATALOG_COLUMNS))})",
+                    row,
+                )
+
+    def count_documents(self) -> int:
+        with self._lock:
+            return self._get_conn().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def list_documents(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_by: str = "timestamp",
+        order: str = "desc",
+        source: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """List catalog entries with keyset pagination
+
+        Returns:
+            tuple: (documents, next_cursor, total matching documents)
+        """
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}. Supported: {', '.join(sorted(SORTABLE_COLUMNS))}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+
+        where = []
+        params: List[Any] = []
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if search:
+            where.append("(title LIKE ? OR url LIKE ?)")
+            params.extend([f"%{search}%", f"%{search}%"])
+        filter_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        filter_params = list(params)
+
+        if cursor:
+            value, last_id = _decode_cursor(cursor)
+            op = "<" if order == "desc" else ">"
+            where.append(f"({sort_by} {op} ? OR ({sort_by} = ? AND document_id {op} ?))")
+            params.extend([value, value, last_id])
+        page_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(
+                f"SELECT {', '.join(CATALOG_COLUMNS)} FROM documents {page_sql} "
+                f"ORDER BY {sort_by} {order}, document_id {order} LIMIT ?",
+                params + [limit + 1],
+            ).fetchall()
+            total = conn.execute(f"SELECT COUNT(*) FROM documents {filter_sql}", filter_params).fetchone()[0]
+
+        documents = [dict(zip(CATALOG_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = _encode_cursor(last[sort_by], last["document_id"])
+        return documents, next_cursor, total
+
+    def find_documents(
+        self,
+        document_ids: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        older_than: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Return {document_id: chunk_count} for catalog entries matching every criterion"""
+        where = []
+        params: List[Any] = []
+        if document_ids:
+            where.append(f"document_id IN ({', '.join('?' * len(document_ids))})")
+            params.extend(document_ids)
+        if source:
+            where.append("source = ?")
+            params.append(source)
+        if older_than:
+            where.append("timestamp != '' AND timestamp < ?")
+            params.append(older_than)
+        if not where:
+            raise ValueError("At least one criterion is required")
+
+        with self._lock:
+            rows = self._get_conn().execute(
+                f"SELECT document_id, chunk_count FROM documents WHERE {' AND '.join(where)}", params
+            ).fetchall()
+        return dict(rows)
+
+    def delete_documents(self, document_ids: List[str]):
+        """Forget everything stored for the given documents"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                for i in range(0, len(document_ids), 500):
+                    batch = document_ids[i:i + 500]
+                    placeholders = ", ".join("?" * len(batch))
+                    conn.execute(f"DELETE FROM chunk_manifest WHERE document_id IN ({placeholders})", batch)
+                    conn.execute(f"DELETE FROM documents WHERE document_id IN ({placeholders})", batch)
+                    conn.execute(f"DELETE FROM files WHERE document_id IN ({placeholders})", batch)
+
+    def delete_document(self, document_id: str):
+        """Forget everything stored for a document"""
+        self.delete_documents([document_id])
+
+    async def aget_manifest(self, document_id: str) -> Dict[str, str]:
+        return await asyncio.to_thread(self.get_manifest, document_id)
+
+    async def areplace_manifest(self, document_id: str, entries: List[Tuple[str, str]]):
+        await asyncio.to_thread(self.replace_manifest, document_id, entries)
+
+    async def aget_file(self, sha256: str) -> Optional[Dict[str, str]]:
+        return await asyncio.to_thread(self.get_file, sha256)
+
+    async def aput_file(self, sha256: str, document_id: str, chunking: str):
+        await asyncio.to_thread(self.put_file, sha256, document_id, chunking)
+
+    async def adelete_document(self, document_id: str):
+        await asyncio.to_thread(self.delete_document, document_id)
+
+    async def afind_documents(self, **kwargs) -> Dict[str, int]:
+        return await asyncio.to_thread(self.find_documents, **kwargs)
+
+    async def adelete_documents(self, document_ids: List[str]):
+        await asyncio.to_thread(self.delete_documents, document_ids)
+
+    async def aupsert_document(self, document: Dict[str, Any]):
+        await asyncio.to_thread(self.upsert_document, document)
+
+    async def acount_documents(self) -> int:
+        return await asyncio.to_thread(self.count_documents)
+
+    async def alist_documents(self, **kwargs) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        return await asyncio.to_thread(self.list_documents, **kwargs)
+
+
+document_store = DocumentStore(settings.DOCUMENT_STORE_PATH)
@@ -0,0 +1,155 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+from app.storage.sqlite import SQLiteStore
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(provider: str, model: str, text: str) -> str:
+    """Content-addressed cache key for an embedding"""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+
+class EmbeddingCache(SQLiteStore):
+    """Two-tier embedding cache: in-memory LRU backed by a SQLite file
+
+    Keys are built with ``cache_key`` so identical text embedded with the same
+    provider and model is only ever sent to the provider once. The number of
+    rows on disk is counted once when the file is opened and kept up to date
+    by writes, so bounding the disk tier never scans the table. Without a
+    path only the memory tier is used.
+    """
+
+    NAME = "embedding cache"
+    PRAGMAS = ("journal_mode=WAL", "synchronous=NORMAL")
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)",
+    )
+
+    def __init__(self, path: Optional[str], memory_size: int = 10000, max_entries: int = 500000):
+        super().__init__(path)
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._disk_entries = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _opened(self, conn: sqlite3.Connection):
+        self._disk_entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Look up keys in memory first, then on disk"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            conn = self._get_conn()
+            if pending and conn is not None:
+                now = time.time()
+                # Stay below SQLite's bound-parameter limit
+                for i in range(0, len(pending), 500):
+                    batch = pending[i:i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+                    if rows:
+                        conn.executemany(
+                            "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                            [(now, key) for key, _ in rows],
+                        )
+                conn.commit()
+
+            self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store vectors in both tiers and enforce the on-disk size bound"""
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+            conn = self._get_conn()
+            if conn is None:
+                return
+            now = time.time()
+            keys = list(items)
+            existing = 0
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                existing += conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+            )
+            self._disk_entries += len(keys) - existing
+            if self._disk_entries > self.max_entries:
+                excess = self._disk_entries - self.max_entries
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                self._disk_entries = self.max_entries
+                logger.info(f"Evicted {excess} entries from embedding cache")
+            conn.commit()
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Async wrapper so disk lookups don't block the event loop"""
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aput_many(self, items: Dict[str, List[float]]):
+        """Async wrapper so disk writes don't block the event loop"""
+        await asyncio.to_thread(self.put_many, items)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            self._get_conn()
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries,
+            }
+
+    async def astats(self) -> Dict[str, int]:
+        """Async wrapper: waits for the lock, and may open the disk tier, off the event loop"""
+        return await asyncio.to_thread(self.stats)
@@ -0,0 +1,60 @@
+from typing import Any, Dict, Optional
+from app.storage.sqlite import SQLiteStore
+import asyncio
+import sqlite3
+import time
+
+PAGE_COLUMNS = ("etag", "last_modified", "body_hash", "title", "chunking", "extractor")
+
+
+class HttpCache(SQLiteStore):
+    """On-disk HTTP validators for ingested web pages
+
+    Stores the ETag, Last-Modified and a hash of the body last ingested for
+    each URL, along with the HTML extractor and chunking strategy used, so
+    re-ingestion can send a conditional GET and skip parsing and embedding
+    when nothing changed.
+    """
+
+    NAME = "HTTP cache"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pages ("
+        "url TEXT PRIMARY KEY, etag TEXT NOT NULL DEFAULT '', "
+        "last_modified TEXT NOT NULL DEFAULT '', body_hash TEXT NOT NULL DEFAULT '', "
+        "title TEXT NOT NULL DEFAULT '', chunking TEXT NOT NULL DEFAULT '', fetched_at REAL NOT NULL, "
+        "extractor TEXT NOT NULL DEFAULT '')",
+    )
+
+    def _opened(self, conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(pages)")}
+        if "extractor" not in columns:
+            # Caches written before the extractor was recorded; their pages are fetched again once
+            conn.execute("ALTER TABLE pages ADD COLUMN extractor TEXT NOT NULL DEFAULT ''")
+            conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored validators for a URL, if any"""
+        with self._lock:
+            row = self._get_conn().execute(
+                f"SELECT {', '.join(PAGE_COLUMNS)} FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(PAGE_COLUMNS, row))
+
+    def put(self, url: str, page: Dict[str, Any]):
+        """Remember the validators of a page that was ingested successfully"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO pages (url, {', '.join(PAGE_COLUMNS)}, fetched_at) "
+                    f"VALUES (?, {', '.join('?' * len(PAGE_COLUMNS))}, ?)",
+                    (url, *(page.get(column) or "" for column in PAGE_COLUMNS), time.time()),
+                )
+
+    async def aget(self, url: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(self, url: str, page: Dict[str, Any]):
+        await asyncio.to_thread(self.put, url, page)
@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.storage.sqlite import SQLiteStore
+import asyncio
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = [
+    "job_id", "kind", "status", "payload", "progress", "result", "error",
+    "attempts", "created_at", "started_at", "finished_at",
+]
+JSON_COLUMNS = {"payload", "progress", "result"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore(SQLiteStore):
+    """Local SQLite sidecar holding ingestion jobs
+
+    Jobs are written before they are acknowledged, so a job accepted by the
+    API survives a restart. A job found ``running`` on startup was
+    interrupted by a crash and is queued again, up to JOB_MAX_ATTEMPTS.
+    """
+
+    NAME = "job store"
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+        "payload TEXT NOT NULL, progress TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT, "
+        "attempts INTEGER NOT NULL DEFAULT 0, created_at TEXT NOT NULL, "
+        "started_at TEXT, finished_at TEXT)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)",
+    )
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        job = dict(zip(JOB_COLUMNS, row))
+        for column in JSON_COLUMNS:
+            if job[column] is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    def create(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new queued job"""
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, kind, json.dumps(payload), _now()),
+                )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._get_conn().execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally with one status"""
+        where = "WHERE status = ?" if status else ""
+        params: List[Any] = [status] if status else []
+        with self._lock:
+            rows = self._get_conn().execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job running; False if it is no longer queued"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                    "progress = '{}' WHERE job_id = ? AND status = 'queued'",
+                    (_now(), job_id),
+                )
+        return cursor.rowcount == 1
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        progress: Dict[str, Any],
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ):
+        """Record the outcome of a job"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, finished_at = ? "
+                    "WHERE job_id = ?",
+                    (status, json.dumps(progress), json.dumps(result) if result is not None else None,
+                     error, _now(), job_id),
+                )
+
+    def recover(self, max_attempts: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Requeue jobs interrupted by a crash
+
+        Jobs that were already attempted ``max_attempts`` times are failed
+        instead, so a document that crashes the process cannot do so forever.
+
+        Returns:
+            tuple: (IDs of all queued jobs oldest first, jobs failed here)
+        """
+        with self._lock:
+            conn = self._get_conn()
+            abandoned = conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE status = 'running' AND attempts >= ?",
+                (max_attempts,),
+            ).fetchall()
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, "
+                    "error = 'Interrupted too many times' WHERE status = 'running' AND attempts >= ?",
+                    (_now(), max_attempts),
+                )
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = 'queued' WHERE status = 'running'"
+                ).rowcount
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        if requeued or abandoned:
+            logger.warning(f"Requeued {requeued} and failed {len(abandoned)} interrupted ingestion jobs")
+        return [row[0] for row in rows], [self._row_to_job(row) for row in abandoned]
+
+    def prune(self, older_than: str) -> int:
+        """Delete finished jobs that ended before ``older_than``"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                return conn.execute(
+                    "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                    (older_than,),
+                ).rowcount
+
+    async def acreate(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.create, kind, payload)
+
+    async def aget(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, job_id)
+
+    async def alist(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.list, status, limit)
+
+    async def aclaim(self, job_id: str) -> bool:
+        return await asyncio.to_thread(self.claim, job_id)
+
+    async def afinish(self, job_id: str, status: str, progress: Dict[str, Any], **kwargs):
+        await asyncio.to_thread(self.finish, job_id, status, progress, **kwargs)
+
+
+job_store = JobStore(settings.JOB_STORE_PATH)
@@ -0,0 +1,46 @@
+from typing import Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStore:
+    """Base of the local SQLite sidecars
+
+    The connection is opened on first use: the parent directory is created,
+    PRAGMAS are applied and the SCHEMA statements run. It is shared by the
+    threads that async callers hand blocking calls to, so every use must hold
+    ``_lock``. A store without a path is disabled and has no connection.
+    """
+
+    NAME = "SQLite store"
+    PRAGMAS: Tuple[str, ...] = ("journal_mode=WAL",)
+    SCHEMA: Tuple[str, ...] = ()
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        """Lazy initialization of the SQLite connection and schema"""
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                conn.execute(f"PRAGMA {pragma}")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._opened(conn)
+            self._conn = conn
+            logger.info(f"Opened {self.NAME} at {self.path}")
+        return self._conn
+
+    def _opened(self, conn: sqlite3.Connection):
+        """Called once the schema is in place, before the connection is used"""
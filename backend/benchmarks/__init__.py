@@ -0,0 +1 @@
+# Micro-benchmarks, run from backend/: python -m benchmarks.<name>
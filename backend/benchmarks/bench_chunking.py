@@ -0,0 +1,112 @@
+"""Compare the streaming SemanticChunker with the previous regex + rfind implementation
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunking [--sizes 1 4 16] [--repeat 3]
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+
+from app.core.chunking import SemanticChunker
+
+
+class LegacyChunker:
+    """The chunker as it was before the streaming rewrite, kept for comparison"""
+
+    def __init__(self, chunk_size: int, overlap: int):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def chunk(self, text: str) -> List[str]:
+        text = re.sub(r'\s+', ' ', text).strip()
+
+        if not text:
+            return []
+
+        chunks = []
+        start = 0
+
+        while start < len(text):
+            end = start + self.chunk_size
+
+            if end < len(text):
+                for delimiter in ['. ', '! ', '? ', '.\n', '!\n', '?\n', '\n\n']:
+                    last_pos = text.rfind(delimiter, start, end)
+                    if last_pos != -1:
+                        end = last_pos + len(delimiter)
+                        break
+
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+
+            if end >= len(text):
+                break
+            # The original stepped backwards (and never terminated) when a
+            # delimiter fell inside the overlap; force progress so it can be timed
+            start = max(end - self.overlap, start + 1)
+
+        return chunks
+
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog vector index embedding retrieval "
+    "latency throughput qdrant chunk overlap paragraph sentence boundary"
+).split()
+
+
+def make_text(megabytes: float, seed: int = 0) -> str:
+    """Prose-like text with sentences, line breaks and paragraphs"""
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    parts = []
+    size = 0
+    while size < target:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 25))).capitalize()
+        sentence += rng.choice([". ", ". ", "! ", "? ", ".\n", ".\n\n", ".   \n\n\n"])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def bench(label: str, fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="input sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    legacy = LegacyChunker(args.chunk_size, args.overlap)
+    streaming = SemanticChunker(args.chunk_size, args.overlap)
+
+    print(f"{'size':>8} {'impl':<22} {'seconds':>9} {'MB/s':>8} {'chunks':>8}")
+    for mb in args.sizes:
+        text = make_text(mb)
+        piece = 64 * 1024
+        runs = [
+            ("legacy", lambda: legacy.chunk(text)),
+            ("streaming (str)", lambda: streaming.chunk(text)),
+            ("streaming (64KB iter)", lambda: list(streaming.iter_chunks(
+                text[i:i + piece] for i in range(0, len(text), piece)
+            ))),
+        ]
+        for name, fn in runs:
+            seconds, chunks = bench(name, fn, args.repeat)
+            print(f"{mb:>6}MB {name:<22} {seconds:>9.3f} {mb / seconds:>8.1f} {len(chunks):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare HTML extraction engines on a corpus of saved pages
+
+Reports time per page and extracted text size for each engine in
+app.core.extractors.HTML_EXTRACTORS. Save real pages into the corpus
+directory (browser "Save page as… HTML only") to benchmark your own sources.
+
+Usage (from backend/):
+    python -m benchmarks.bench_html_extraction [--corpus DIR] [--scale 1 20] [--repeat 5]
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from app.core.extractors import HTML_EXTRACTORS, extract_html
+
+CORPUS = Path(__file__).parent / "html_corpus"
+PARAGRAPH = re.compile(rb"<p[ >].*?</p>", re.DOTALL | re.IGNORECASE)
+
+
+def scale_page(content: bytes, factor: int) -> bytes:
+    """Repeat every paragraph to simulate a much longer page with the same layout"""
+    if factor <= 1:
+        return content
+    return PARAGRAPH.sub(lambda m: m.group(0) * factor, content)
+
+
+def bench(engine: str, content: bytes, repeat: int):
+    best = float("inf")
+    page = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        page = extract_html(content, "https://example.com/page", engine)
+        best = min(best, time.perf_counter() - t0)
+    return best, page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 20], help="paragraph repetition factors")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.htm*"))
+    if not pages:
+        parser.error(f"No .html files in {args.corpus}")
+
+    print(f"{'page':<24} {'scale':>5} {'KB':>7} {'engine':<6} {'ms':>8} {'chars':>8}  title")
+    totals = {engine: [0.0, 0] for engine in HTML_EXTRACTORS}
+    for path in pages:
+        raw = path.read_bytes()
+        for factor in args.scale:
+            content = scale_page(raw, factor)
+            for engine in HTML_EXTRACTORS:
+                seconds, page = bench(engine, content, args.repeat)
+                totals[engine][0] += seconds
+                totals[engine][1] += len(page["text"])
+                print(
+                    f"{path.stem[:24]:<24} {factor:>5} {len(content) / 1024:>7.1f} {engine:<6} "
+                    f"{seconds * 1000:>8.2f} {len(page['text']):>8}  {page['title'][:50]}"
+                )
+
+    print()
+    for engine, (seconds, chars) in totals.items():
+        print(f"total {engine:<6} {seconds * 1000:>10.2f} ms {chars:>10} chars")
+
+
+if __name__ == "__main__":
+    main()
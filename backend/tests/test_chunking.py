@@ -0,0 +1,82 @@
+"""SemanticChunker streaming: piece boundaries must not change chunks or offsets"""
+from typing import List
+import random
+
+import pytest
+
+from app.core.chunking import SemanticChunker, normalize_whitespace
+
+# Words, punctuation and whitespace runs, so pieces split sentence ends,
+# paragraph breaks and whitespace that normalization collapses
+TOKENS = ["word", "chunk", "a", "Sentence", ".", "!", "?", " ", "  ", "\t", "\n", "\n\n", "\n\n\n", " \n ", "\r\n"]
+
+
+def random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 400)))
+
+
+def random_pieces(rng: random.Random, text: str) -> List[str]:
+    pieces = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 50)
+        pieces.append(text[i:i + size])
+        i += size
+    return pieces
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_pieces_match_whole_text(seed):
+    rng = random.Random(seed)
+    chunk_size = rng.randint(20, 120)
+    chunker = SemanticChunker(chunk_size, rng.randint(0, chunk_size // 2))
+    text = random_text(rng)
+
+    whole = list(chunker.iter_spans([text]))
+    pieced = list(chunker.iter_spans(random_pieces(rng, text)))
+
+    assert pieced == whole
+    assert [chunk for chunk, _, _ in whole] == chunker.chunk(text)
+    normalized = normalize_whitespace(text.rstrip()).lstrip()
+    for chunk, start, end in pieced:
+        assert chunk == normalized[start:end].strip()
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_piece_start_marks_where_each_piece_begins(seed):
+    """Pages fed with a separator, as PDF ingestion does, can be cut back out at piece_start"""
+    rng = random.Random(seed)
+    pages = [random_text(rng)[:rng.randint(0, 200)] for _ in range(rng.randint(1, 6))]
+    stream = SemanticChunker(60, 10).stream()
+    starts = []
+    for page in pages:
+        stream.feed(page + "\n")
+        starts.append(stream.piece_start)
+    stream.close()
+
+    normalized = normalize_whitespace("".join(page + "\n" for page in pages).rstrip()).lstrip()
+    assert starts == sorted(starts)
+    for page, start, end in zip(pages, starts, starts[1:] + [len(normalized)]):
+        text = normalize_whitespace(page).strip()
+        assert normalized.startswith(text, start)
+        assert normalized[start:end].strip() == text
+
+
+def test_stream_offset_counts_normalized_text():
+    stream = SemanticChunker(100, 10).stream()
+    stream.feed("  first   line \n")
+    assert stream.offset == len("first line")
+    stream.feed("second")
+    assert stream.offset == len("first line\nsecond")
+
+
+def test_zero_overlap_is_kept():
+    chunker = SemanticChunker(100, 0)
+    assert chunker.overlap == 0
+    chunks = chunker.chunk("word " * 100)
+    assert "".join(chunk.replace(" ", "") for chunk in chunks) == "word" * 100
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        SemanticChunker(100, 100)
@@ -0,0 +1,180 @@
+"""BulkCrawler against a local HTTP fixture server"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+import asyncio
+import gzip
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.core.crawler import BulkCrawler, parse_sitemap
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{base}/a</loc></url>
+  <url><loc>{base}/b</loc></url>
+</urlset>"""
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{base}/sitemap-pages.xml.gz</loc></sitemap>
+  <sitemap><loc>{base}/missing.xml</loc></sitemap>
+</sitemapindex>"""
+
+
+class FixtureServer:
+    """Serves fixed routes and records when each request arrived and how many overlapped"""
+
+    def __init__(self, routes: Dict[str, Tuple[int, bytes]], delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests: List[Tuple[str, float]] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests.append((self.path, time.monotonic()))
+                    fixture.active += 1
+                    fixture.max_active = max(fixture.max_active, fixture.active)
+                try:
+                    if self.path != "/robots.txt":
+                        time.sleep(fixture.delay)
+                    status, body = fixture.routes.get(self.path, (404, b"not found"))
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with fixture._lock:
+                        fixture.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def paths(self) -> List[str]:
+        return [path for path, _ in self.requests]
+
+
+@pytest.fixture
+def serve():
+    servers: List[FixtureServer] = []
+
+    def start(routes: Dict[str, Tuple[int, bytes]], delay: float = 0.0) -> FixtureServer:
+        server = FixtureServer(routes, delay)
+        server.thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.httpd.shutdown()
+        server.httpd.server_close()
+
+
+async def fetch(url: str) -> bytes:
+    async with httpx.AsyncClient() as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.content
+
+
+async def ingest(url: str) -> Dict:
+    """Stands in for IngestionService.ingest_url: fetch failures raise"""
+    body = await fetch(url)
+    return {"status": "success", "chunks_count": 1, "point_ids": ["p"], "title": body.decode()}
+
+
+def crawl(urls: List[str], **kwargs) -> List[Dict]:
+    async def run():
+        crawler = BulkCrawler(ingest_fn=ingest, fetch_fn=fetch, **kwargs)
+        return [result async for result in crawler.run(urls)]
+
+    return asyncio.run(run())
+
+
+def test_reports_one_result_per_url_with_fetch_errors(serve):
+    server = serve({"/a": (200, b"page a"), "/gone": (410, b""), "/broken": (500, b"")})
+    results = crawl([
+        f"{server.base}/a",
+        f"{server.base}/a",
+        f"{server.base}/gone",
+        f"{server.base}/broken",
+        f"{server.base}/missing",
+        "ftp://example.com/file",
+    ])
+
+    by_url = {result["url"]: result for result in results}
+    assert len(results) == 5
+    assert by_url[f"{server.base}/a"]["status"] == "success"
+    assert by_url[f"{server.base}/a"]["title"] == "page a"
+    assert "point_ids" not in by_url[f"{server.base}/a"]
+    for path in ("/gone", "/broken", "/missing"):
+        assert by_url[f"{server.base}{path}"]["status"] == "error"
+    assert by_url["ftp://example.com/file"]["status"] == "error"
+    assert server.paths().count("/a") == 1
+
+
+def test_unreachable_host_is_an_error(serve):
+    server = serve({})
+    server.httpd.shutdown()
+    server.httpd.server_close()
+    results = crawl([f"{server.base}/a"])
+    assert [result["status"] for result in results] == ["error"]
+
+
+def test_limits_concurrent_requests_per_host(serve):
+    server = serve({f"/{i}": (200, b"page") for i in range(8)}, delay=0.1)
+    results = crawl([f"{server.base}/{i}" for i in range(8)], max_concurrency=8, max_per_host=2)
+
+    assert [result["status"] for result in results] == ["success"] * 8
+    assert server.max_active == 2
+
+
+def test_robots_disallow_and_crawl_delay(serve):
+    robots = b"User-agent: pks\nDisallow: /private\nCrawl-delay: 1\n"
+    server = serve({"/robots.txt": (200, robots), "/a": (200, b"a"), "/b": (200, b"b"), "/private": (200, b"")})
+    results = crawl(
+        [f"{server.base}/a", f"{server.base}/private", f"{server.base}/b"],
+        respect_robots=True,
+        user_agent="pks",
+    )
+
+    statuses = {result["url"]: result["status"] for result in results}
+    assert statuses[f"{server.base}/private"] == "skipped"
+    assert statuses[f"{server.base}/a"] == statuses[f"{server.base}/b"] == "success"
+    assert server.paths().count("/robots.txt") == 1
+    assert "/private" not in server.paths()
+    times = [at for path, at in server.requests if path in ("/a", "/b")]
+    assert times[1] - times[0] >= 0.9
+
+
+def test_expands_gzipped_sitemap_index(serve):
+    routes = {"/sitemap.xml": (200, b"")}
+    server = serve(routes)
+    routes["/sitemap.xml"] = (200, SITEMAP_INDEX.format(base=server.base).encode())
+    routes["/sitemap-pages.xml.gz"] = (200, gzip.compress(SITEMAP.format(base=server.base).encode()))
+
+    async def expand():
+        crawler = BulkCrawler(ingest_fn=ingest, fetch_fn=fetch)
+        return await crawler.expand_sitemap(f"{server.base}/sitemap.xml", limit=10)
+
+    assert asyncio.run(expand()) == [f"{server.base}/a", f"{server.base}/b"]
+
+
+def test_parse_sitemap_ignores_entities():
+    content = b"""<?xml version="1.0"?>
+<!DOCTYPE urlset [<!ENTITY x SYSTEM "file:///etc/passwd">]>
+<urlset><url><loc>https://example.com/&x;</loc></url></urlset>"""
+    is_index, locations = parse_sitemap(content)
+    assert not is_index
+    assert all("root:" not in location for location in locations)
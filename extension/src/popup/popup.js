@@ -31,6 +31,26 @@ function showStatus(message, type = 'loading') {
   }
 }
 
+// Give up on an ingestion job after this long
+const JOB_WAIT_MS = 10 * 60 * 1000;
+
+// Wait for a background ingestion job to finish
+async function waitForJob(jobId) {
+  const deadline = Date.now() + JOB_WAIT_MS;
+  while (Date.now() < deadline) {
+    const response = await fetch(`http://localhost:8100/api/v1/jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error(`Could not check ingestion job (${response.status})`);
+    }
+    const job = await response.json();
+    if (job.status === 'succeeded' || job.status === 'failed') {
+      return job;
+    }
+    await new Promise(resolve => setTimeout(resolve, 1000));
+  }
+  throw new Error('Ingestion is taking too long; check the PKS backend');
+}
+
 // Save page to PKS
 async function saveToPKS() {
   if (!currentTab || !currentTab.url) {
@@ -59,9 +79,14 @@ async function saveToPKS() {
     });
 
     if (response.ok) {
-      const result = await response.json();
-      console.log('Saved successfully:', result);
-      showStatus(`✓ Saved! (${result.chunks_count} chunks)`, 'success');
+      const job = await waitForJob((await response.json()).job_id);
+      if (job.status === 'succeeded') {
+        console.log('Saved successfully:', job.result);
+        showStatus(`✓ Saved! (${job.result.chunks_count} chunks)`, 'success');
+      } else {
+        console.error('Save failed:', job.error);
+        showStatus(`✗ Failed: ${job.error || 'Unknown error'}`, 'error');
+      }
     } else {
       const error = await response.json();
       console.error('Save failed:', error);
@@ -69,7 +94,8 @@ async function saveToPKS() {
     }
   } catch (error) {
     console.error('Error saving:', error);
-    showStatus('✗ Failed to connect to PKS backend', 'error');
+    // fetch rejects with a TypeError when the backend cannot be reached
+    showStatus(error instanceof TypeError ? '✗ Failed to connect to PKS backend' : `✗ Failed: ${error.message}`, 'error');
   } finally {
     saveBtn.disabled = false;
   }
@@ -6,6 +6,32 @@ class Settings(BaseSettings):
     WATCH_PATH: str = os.getenv("WATCH_PATH", "/app/inbox")
     BACKEND_URL: str = os.getenv("BACKEND_URL", "http://backend:8000")
     PROCESSED_PATH: str = os.getenv("PROCESSED_PATH", "/app/processed")
+    # Watch subdirectories of WATCH_PATH too
+    RECURSIVE: bool = os.getenv("RECURSIVE", "false").lower() in ("1", "true", "yes")
+    # Move ingested files to PROCESSED_PATH; when off, files stay in place and
+    # modified files are re-ingested as new versions of the same document
+    MOVE_PROCESSED: bool = os.getenv("MOVE_PROCESSED", "true").lower() in ("1", "true", "yes")
+    # Record of ingested files (path, size, mtime, content hash) kept across restarts
+    MANIFEST_PATH: str = os.getenv("MANIFEST_PATH", "/app/state/manifest.db")
+    # Directories listed in parallel by the startup scan
+    SCAN_CONCURRENCY: int = int(os.getenv("SCAN_CONCURRENCY", "8"))
+    # Files sent to the backend concurrently
+    WORKERS: int = int(os.getenv("WORKERS", "4"))
+    # A file is ready once its size and mtime are unchanged for this long
+    STABLE_SECONDS: float = float(os.getenv("STABLE_SECONDS", "1.0"))
+    STABLE_POLL_INTERVAL: float = float(os.getenv("STABLE_POLL_INTERVAL", "0.25"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "300"))
+    # Retries with exponential backoff while the backend is unreachable or overloaded
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "1.0"))
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "60"))
+    # Files are recorded as ingested once their backend job succeeds; its status is polled this often
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    JOB_WAIT_TIMEOUT: float = float(os.getenv("JOB_WAIT_TIMEOUT", "3600"))
+    # Files up to BATCH_FILE_MAX_BYTES are uploaded together, up to these limits per request
+    BATCH_MAX_FILES: int = int(os.getenv("BATCH_MAX_FILES", "16"))
+    BATCH_FILE_MAX_BYTES: int = int(os.getenv("BATCH_FILE_MAX_BYTES", str(256 * 1024)))
+    BATCH_MAX_BYTES: int = int(os.getenv("BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
 
     class Config:
         env_file = ".env"
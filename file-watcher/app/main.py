@@ -1,10 +1,14 @@
 import asyncio
 import logging
 import os
+import signal
 import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from app.manifest import Manifest
+from app.pipeline import Pipeline
 from app.processor import FileProcessor
+from app.scanner import is_candidate, scan_tree
 from app.config import settings
 
 logging.basicConfig(
@@ -15,40 +19,112 @@ logger = logging.getLogger(__name__)
 
 
 class FileWatcherHandler(FileSystemEventHandler):
-    """Handle file system events for new files"""
+    """Hand new and changed files over to the pipeline without blocking the observer thread"""
 
-    def __init__(self, processor: FileProcessor):
+    def __init__(self, pipeline: Pipeline, processor: FileProcessor):
+        self.pipeline = pipeline
         self.processor = processor
-        self.last_processed = {}
+
+    def _submit(self, file_path: str):
+        if is_candidate(os.path.basename(file_path)):
+            self.pipeline.submit_threadsafe(file_path)
+
+    def _remove(self, file_path: str):
+        # Moving processed files out of the inbox is not a removal
+        if not settings.MOVE_PROCESSED:
+            asyncio.run_coroutine_threadsafe(self.processor.remove([file_path]), self.pipeline.loop)
 
     def on_created(self, event):
         if event.is_directory:
             return
+        logger.info(f"New file detected: {event.src_path}")
+        self._submit(event.src_path)
 
-        file_path = event.src_path
-        # Debounce: wait for file to be fully written
-        time.sleep(1)
+    def on_modified(self, event):
+        # Size and mtime are compared with the manifest, so repeated events are cheap
+        if event.is_directory:
+            return
+        self._submit(event.src_path)
 
-        logger.info(f"New file detected: {file_path}")
-        asyncio.run(self.processor.process(file_path))
+    def on_moved(self, event):
+        # Files renamed into the inbox (atomic writes) only produce a move event
+        if event.is_directory:
+            return
+        logger.info(f"File moved in: {event.dest_path}")
+        self._remove(event.src_path)
+        self._submit(event.dest_path)
 
+    def on_deleted(self, event):
+        if event.is_directory:
+            return
+        self._remove(event.src_path)
 
-def main():
-    """Main entry point for file watcher"""
-    processor = FileProcessor()
-    event_handler = FileWatcherHandler(processor)
-    observer = Observer()
-    observer.schedule(event_handler, settings.WATCH_PATH, recursive=False)
-    observer.start()
 
-    logger.info(f"Watching {settings.WATCH_PATH} for new files...")
+async def reconcile(pipeline: Pipeline, processor: FileProcessor):
+    """Queue files that arrived or changed while the watcher was not running
 
+    Only a stat per file is needed: files whose size and mtime match the
+    manifest are skipped without being read. Files that are gone are
+    removed from the manifest (and their documents, when files stay in place).
+    """
+    started = time.monotonic()
+    found = await scan_tree(settings.WATCH_PATH, settings.RECURSIVE, settings.SCAN_CONCURRENCY)
+    known = await asyncio.to_thread(processor.manifest.signatures)
+    rejected = await asyncio.to_thread(processor.manifest.rejected)
+    gone = [path for path in known if path not in found]
+    await processor.remove(gone)
+
+    queued = 0
+    ingested = []
+    settled_before = time.time() - settings.STABLE_SECONDS
+    for file_path, (size, mtime_ns) in found.items():
+        if known.get(file_path) == (size, mtime_ns):
+            # Rejected files stay in the inbox until they change
+            if file_path not in rejected:
+                ingested.append(file_path)
+            continue
+        at_rest = mtime_ns / 1e9 <= settled_before
+        pipeline.submit(file_path, size if at_rest else None)
+        queued += 1
+    if settings.MOVE_PROCESSED:
+        # Ingested, but the watcher stopped before moving them
+        await asyncio.to_thread(processor.move_processed, ingested)
+    logger.info(
+        f"Startup scan: {len(found)} files, {queued} queued, {len(ingested)} already ingested, "
+        f"{len(found) - queued - len(ingested)} rejected, {len(gone)} gone ({time.monotonic() - started:.1f}s)"
+    )
+
+
+async def run():
+    """Watch the inbox until SIGINT or SIGTERM"""
+    manifest = Manifest(settings.MANIFEST_PATH)
+    processor = FileProcessor(manifest)
+    pipeline = Pipeline(processor.process, settings.WORKERS)
+    pipeline.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Watch before scanning so nothing arriving during the scan is missed
+    observer = Observer()
+    observer.schedule(FileWatcherHandler(pipeline, processor), settings.WATCH_PATH, recursive=settings.RECURSIVE)
+    observer.start()
+    logger.info(f"Watching {settings.WATCH_PATH}{' recursively' if settings.RECURSIVE else ''} for new files...")
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
+        await reconcile(pipeline, processor)
+        await stop.wait()
+    finally:
         observer.stop()
-    observer.join()
+        await asyncio.to_thread(observer.join)
+        await pipeline.close()
+        await processor.close()
+
+
+def main():
+    """Main entry point for file watcher"""
+    asyncio.run(run())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime in nanoseconds): cheap to compare against a fresh stat
+Signature = Tuple[int, int]
+
+# Entry status: ingested, or refused by the backend in a way retrying cannot fix
+INGESTED = "ingested"
+REJECTED = "rejected"
+
+
+class Manifest:
+    """SQLite record of the files already ingested or rejected
+
+    Holds path, size, mtime, content hash and status per file. A file whose
+    size and mtime match its entry is skipped without being read; one whose
+    contents still hash to its entry is skipped after hashing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Lazy initialization of the SQLite connection and schema"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                f"sha256 TEXT NOT NULL, ingested_at REAL NOT NULL, status TEXT NOT NULL DEFAULT '{INGESTED}')"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+            if "status" not in columns:
+                # Manifests written before rejections were recorded
+                self._conn.execute(f"ALTER TABLE files ADD COLUMN status TEXT NOT NULL DEFAULT '{INGESTED}'")
+            self._conn.commit()
+            logger.info(f"Opened manifest at {self.path}")
+        return self._conn
+
+    def signatures(self) -> Dict[str, Signature]:
+        """Return {path: (size, mtime_ns)} for every recorded file"""
+        with self._lock:
+            rows = self._get_conn().execute("SELECT path, size, mtime_ns FROM files").fetchall()
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def rejected(self) -> Set[str]:
+        """Return the paths whose last recorded version was rejected"""
+        with self._lock:
+            rows = self._get_conn().execute("SELECT path FROM files WHERE status = ?", (REJECTED,)).fetchall()
+        return {path for path, in rows}
+
+    def get(self, path: str) -> Optional[Tuple[int, int, str, str]]:
+        """Return (size, mtime_ns, sha256, status) recorded for a path"""
+        with self._lock:
+            return self._get_conn().execute(
+                "SELECT size, mtime_ns, sha256, status FROM files WHERE path = ?", (path,)
+            ).fetchone()
+
+    def record(self, entries: Iterable[Tuple[str, int, int, str]], status: str = INGESTED):
+        """Record (path, size, mtime_ns, sha256) of ingested, or rejected, files"""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, ingested_at, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*entry, now, status) for entry in entries],
+                )
+
+    def forget(self, paths: List[str]):
+        """Drop entries for files that no longer exist"""
+        with self._lock:
+            conn = self._get_conn()
+            with conn:
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def wait_until_stable(file_path: str, stable_seconds: float, interval: float) -> Optional[int]:
+    """Wait until a file's size and mtime stop changing and return its size
+
+    Returns None if the file disappears before it settles.
+    """
+    last: Optional[Tuple[int, int]] = None
+    stable_since = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            stat = await asyncio.to_thread(os.stat, file_path)
+        except FileNotFoundError:
+            return None
+        current = (stat.st_size, stat.st_mtime_ns)
+        now = loop.time()
+        if current != last:
+            last, stable_since = current, now
+        elif now - stable_since >= stable_seconds:
+            return stat.st_size
+        await asyncio.sleep(interval)
+
+
+class Pipeline:
+    """Feeds files from the watchdog thread to a pool of async workers
+
+    The observer thread only hands paths to the event loop, so event
+    delivery never waits on processing. Each file first settles on its own
+    (waiting costs nothing but a timer), then joins a queue drained by
+    ``workers`` tasks, which bounds how many requests are in flight. A
+    worker that picks up a small file takes other small files already
+    waiting along with it, so they share one request. A file that changes
+    again while settling starts settling over; one that changes while
+    queued or being processed settles again and is processed once more.
+    """
+
+    def __init__(self, process: Callable[[List[str]], Awaitable[None]], workers: int):
+        self.process = process
+        self.workers = max(1, workers)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._worker_tasks = []
+        # Paths settling, queued or being processed
+        self._pending: Set[str] = set()
+        self._settling: Dict[str, asyncio.Task] = {}
+        # Queued or in-process paths that changed again since they settled
+        self._changed: Set[str] = set()
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} workers")
+
+    async def close(self):
+        for task in [*self._worker_tasks, *self._tasks]:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, *self._tasks, return_exceptions=True)
+
+    def submit_threadsafe(self, file_path: str):
+        """Schedule a file from any thread (the watchdog observer)"""
+        self.loop.call_soon_threadsafe(self.submit, file_path)
+
+    def submit(self, file_path: str, size: Optional[int] = None):
+        """Schedule a file once it has finished being written
+
+        Pass ``size`` for a file already known to be complete (found at
+        rest by the startup scan) to queue it without waiting for it to settle.
+        """
+        if file_path in self._settling:
+            # Written to again: start waiting over
+            self._settling.pop(file_path).cancel()
+        elif file_path in self._pending:
+            self._changed.add(file_path)
+            return
+        self._pending.add(file_path)
+        if size is not None:
+            self._queue.put_nowait((file_path, size))
+            return
+        task = asyncio.create_task(self._settle(file_path))
+        self._settling[file_path] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _resettle(self, file_path: str) -> bool:
+        """Send a queued file that changed since it settled back to settle; True if it did"""
+        if file_path not in self._changed:
+            return False
+        self._changed.discard(file_path)
+        self._pending.discard(file_path)
+        self.submit(file_path)
+        return True
+
+    async def _settle(self, file_path: str):
+        size = await wait_until_stable(file_path, settings.STABLE_SECONDS, settings.STABLE_POLL_INTERVAL)
+        del self._settling[file_path]
+        if size is not None:
+            self._queue.put_nowait((file_path, size))
+        else:
+            logger.info(f"File disappeared before it was complete: {file_path}")
+            self._pending.discard(file_path)
+
+    def _take_batch(self, first: Tuple[str, int]) -> List[str]:
+        """Add small files that are already queued to a small first file, within the batch limits"""
+        batch = [first[0]]
+        if first[1] > settings.BATCH_FILE_MAX_BYTES:
+            return batch
+        total = first[1]
+        skipped = []
+        while len(batch) < settings.BATCH_MAX_FILES and not self._queue.empty():
+            file_path, size = item = self._queue.get_nowait()
+            if self._resettle(file_path):
+                continue
+            if size > settings.BATCH_FILE_MAX_BYTES or total + size > settings.BATCH_MAX_BYTES:
+                skipped.append(item)
+                if len(skipped) >= settings.BATCH_MAX_FILES:
+                    break
+                continue
+            batch.append(file_path)
+            total += size
+        for item in skipped:
+            self._queue.put_nowait(item)
+        return batch
+
+    async def _worker(self):
+        while True:
+            first = await self._queue.get()
+            if self._resettle(first[0]):
+                continue
+            batch = self._take_batch(first)
+            try:
+                await self.process(batch)
+            except Exception as e:
+                logger.error(f"Error processing {', '.join(batch)}: {str(e)}")
+            finally:
+                for file_path in batch:
+                    if not self._resettle(file_path):
+                        self._pending.discard(file_path)
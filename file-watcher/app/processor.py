@@ -1,48 +1,271 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
 import os
+import random
+import shutil
+import uuid
 import httpx
+from typing import Any, Dict, List, Optional, Tuple
 from app.config import settings
+from app.manifest import REJECTED, Manifest
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Backend down, restarting or shedding load: worth retrying the same request
+RETRYABLE_STATUS = {429, 502, 503, 504}
+# The backend refused the file itself (type, size, contents): retrying the same file cannot help
+REJECTED_STATUS = {400, 413, 415, 422}
+
+METADATA = {'source': 'file-watcher'}
+
+# Namespace for the per-path document IDs used when files stay in place
+WATCHER_NAMESPACE = uuid.UUID("3b0f9d52-7c1e-4a8b-b6d4-2e9f5a7c1d38")
+
+# (path, size, mtime_ns, sha256) of a file about to be uploaded
+FileEntry = Tuple[str, int, int, str]
+
 
 class FileProcessor:
     """Process new files and send to backend API"""
 
-    async def process(self, file_path: str):
-        """Process a new file and send to backend"""
-        try:
-            filename = os.path.basename(file_path)
-
-            # Read file and send to backend
-            with open(file_path, 'rb') as f:
-                files = {'file': (filename, f, 'application/octet-stream')}
-                metadata = {
-                    'filename': filename,
-                    'source': 'file-watcher'
-                }
-
-                async with httpx.AsyncClient(timeout=300.0) as client:
-                    response = await client.post(
-                        f"{settings.BACKEND_URL}/api/v1/ingest",
-                        json={
-                            'text': f.read().decode('utf-8', errors='ignore'),
-                            'metadata': metadata
-                        }
-                    )
-
-                    if response.status_code == 200:
-                        logger.info(f"Successfully processed: {filename}")
-                        # Copy to processed directory instead of rename (fixes cross-device link issue)
-                        processed_path = os.path.join(
-                            settings.PROCESSED_PATH,
-                            filename
-                        )
-                        import shutil
-                        shutil.copy2(file_path, processed_path)
-                        os.remove(file_path)
-                    else:
-                        logger.error(f"Failed to process {filename}: {response.text}")
+    def __init__(self, manifest: Manifest):
+        self.manifest = manifest
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazy initialization of the HTTP client shared by all workers"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.BACKEND_URL,
+                timeout=settings.HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=settings.WORKERS, max_keepalive_connections=settings.WORKERS),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
+    async def process(self, file_paths: List[str]):
+        """Upload files to the backend unless the manifest shows they were already ingested
+
+        One file goes to /upload, several to /upload/batch. Files are sent
+        as multipart straight from disk, so binary formats (PDF, DOCX,
+        images) reach the backend parsers intact and are never held in
+        memory whole. A file is recorded in the manifest only once its
+        ingestion job has succeeded; a file whose job failed is tried again
+        on the next start or when it changes. A file the backend rejects
+        outright is recorded as rejected and left alone until it changes.
+        """
+        entries = []
+        for file_path in file_paths:
+            entry = await asyncio.to_thread(self._check, file_path)
+            if entry is not None:
+                entries.append(entry)
+        if not entries:
+            return
+
+        filenames = ", ".join(os.path.basename(entry[0]) for entry in entries)
+        try:
+            if len(entries) == 1:
+                response = await self._post_files("/api/v1/upload", "file", entries)
+            else:
+                response = await self._post_files("/api/v1/upload/batch", "files", entries)
         except Exception as e:
-            logger.error(f"Error processing {file_path}: {str(e)}")
+            logger.error(f"Error processing {filenames}: {str(e)}")
+            return
+
+        if response.status_code not in (200, 202):
+            logger.error(f"Failed to process {filenames}: {response.text}")
+            if len(entries) == 1 and response.status_code in REJECTED_STATUS:
+                await asyncio.to_thread(self.manifest.record, entries, REJECTED)
+            return
+
+        body = response.json()
+        if len(entries) == 1:
+            queued = [(entries[0], body['job_id'])]
+        else:
+            # Jobs come back in file order, without the rejected files
+            rejected = {item['index']: item for item in body.get('rejected', [])}
+            job_ids = iter(job['job_id'] for job in body.get('jobs', []))
+            queued = []
+            refused = []
+            for index, entry in enumerate(entries):
+                if index in rejected:
+                    logger.error(f"Failed to process {entry[0]}: {rejected[index]['detail']}")
+                    if rejected[index].get('status_code') in REJECTED_STATUS:
+                        refused.append(entry)
+                else:
+                    queued.append((entry, next(job_ids)))
+            if refused:
+                await asyncio.to_thread(self.manifest.record, refused, REJECTED)
+
+        jobs = await asyncio.gather(*(self._wait_for_job(job_id) for _, job_id in queued))
+        succeeded = []
+        for (entry, job_id), job in zip(queued, jobs):
+            if job is None:
+                logger.warning(f"Gave up waiting for job {job_id} of {entry[0]}; it is checked again on the next start")
+            elif job['status'] == 'succeeded':
+                logger.info(f"Successfully processed: {entry[0]}")
+                succeeded.append(entry)
+            else:
+                logger.error(f"Failed to process {entry[0]}: {job.get('error') or 'ingestion job failed'}")
+        await asyncio.to_thread(self._finish, succeeded)
+
+    async def _wait_for_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Poll an ingestion job until it finishes; None if JOB_WAIT_TIMEOUT passes first"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.JOB_WAIT_TIMEOUT
+        while loop.time() < deadline:
+            try:
+                response = await self._get_client().get(f"/api/v1/jobs/{job_id}")
+                if response.status_code == 404:
+                    return {'status': 'failed', 'error': f"Job {job_id} no longer exists"}
+                if response.status_code == 200:
+                    job = response.json()
+                    if job['status'] in ('succeeded', 'failed'):
+                        return job
+            except httpx.TransportError as e:
+                # Backend restarting; queued jobs survive it, so keep polling
+                logger.debug(f"Could not poll job {job_id}: {str(e)}")
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+        return None
+
+    def _check(self, file_path: str) -> Optional[FileEntry]:
+        """Entry to upload for a file, or None if it is gone, already ingested or rejected"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        recorded = self.manifest.get(file_path)
+        if recorded and recorded[:2] == (stat.st_size, stat.st_mtime_ns):
+            if recorded[3] != REJECTED:
+                # Ingested before, e.g. just before a restart interrupted the move
+                self.move_processed([file_path])
+            return None
+
+        sha256 = self._sha256(file_path)
+        entry = (file_path, stat.st_size, stat.st_mtime_ns, sha256)
+        if recorded and recorded[2] == sha256:
+            # Touched, but the contents ingested (or rejected) from this path are unchanged
+            logger.info(f"Unchanged, skipping: {file_path}")
+            if recorded[3] == REJECTED:
+                self.manifest.record([entry], REJECTED)
+            else:
+                self._finish([entry])
+            return None
+        return entry
+
+    def _finish(self, entries: List[FileEntry]):
+        """Record ingested files and move them out of the inbox"""
+        if entries:
+            self.manifest.record(entries)
+        self.move_processed([entry[0] for entry in entries])
+
+    async def remove(self, file_paths: List[str]):
+        """Forget files that left the inbox
+
+        When files stay in place, each file is its own document, so the
+        document of a deleted or renamed file is deleted too. A file whose
+        document could not be deleted stays in the manifest and is retried
+        by the next startup scan.
+        """
+        if settings.MOVE_PROCESSED:
+            await asyncio.to_thread(self.manifest.forget, file_paths)
+            return
+        forgotten = []
+        for file_path in file_paths:
+            recorded = await asyncio.to_thread(self.manifest.get, file_path)
+            if not recorded:
+                continue
+            if recorded[3] == REJECTED:
+                # Never became a document
+                forgotten.append(file_path)
+                continue
+            try:
+                response = await self._get_client().delete(f"/api/v1/documents/{self._document_id(file_path)}")
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.error(f"Could not delete the document of removed file {file_path}: {str(e)}")
+                continue
+            logger.info(f"Deleted the document of removed file {file_path}")
+            forgotten.append(file_path)
+        await asyncio.to_thread(self.manifest.forget, forgotten)
+
+    @staticmethod
+    def _document_id(file_path: str) -> str:
+        relative = os.path.relpath(file_path, settings.WATCH_PATH)
+        return str(uuid.uuid5(WATCHER_NAMESPACE, relative))
+
+    def _file_metadata(self, file_path: str) -> Dict[str, Any]:
+        metadata = {'path': os.path.relpath(file_path, settings.WATCH_PATH)}
+        if not settings.MOVE_PROCESSED:
+            # Files stay in place: a modified file replaces the document it was ingested as
+            metadata['document_id'] = self._document_id(file_path)
+        return metadata
+
+    async def _post_files(self, url: str, field: str, entries: List[FileEntry]) -> httpx.Response:
+        """POST files as multipart, retrying with exponential backoff while the backend is unavailable"""
+        file_paths = [entry[0] for entry in entries]
+        if len(file_paths) == 1:
+            data = {'metadata': json.dumps({**METADATA, **self._file_metadata(file_paths[0])})}
+        else:
+            data = {
+                'metadata': json.dumps(METADATA),
+                'file_metadata': json.dumps([self._file_metadata(path) for path in file_paths]),
+            }
+
+        for attempt in range(settings.MAX_RETRIES + 1):
+            handles = []
+            try:
+                handles = [open(path, 'rb') for path in file_paths]
+                files = [
+                    (field, (os.path.basename(path), handle, self._content_type(path)))
+                    for path, handle in zip(file_paths, handles)
+                ]
+                response = await self._get_client().post(url, files=files, data=data)
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                reason = str(e) or type(e).__name__
+            finally:
+                for handle in handles:
+                    handle.close()
+
+            if attempt == settings.MAX_RETRIES:
+                raise RuntimeError(f"Backend unavailable after {attempt + 1} attempts: {reason}")
+            # Full jitter keeps workers that failed together from retrying in lockstep
+            delay = random.uniform(0, min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2 ** attempt))
+            logger.warning(f"Backend unavailable ({reason}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _content_type(file_path: str) -> str:
+        return mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+    @staticmethod
+    def move_processed(file_paths: List[str]):
+        """Move ingested files out of the inbox when MOVE_PROCESSED is on"""
+        if not settings.MOVE_PROCESSED:
+            return
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                continue
+            # Copy to processed directory instead of rename (fixes cross-device link issue)
+            processed_path = os.path.join(settings.PROCESSED_PATH, os.path.relpath(file_path, settings.WATCH_PATH))
+            os.makedirs(os.path.dirname(processed_path), exist_ok=True)
+            shutil.copy2(file_path, processed_path)
+            os.remove(file_path)
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Tuple
+from app.manifest import Signature
+
+logger = logging.getLogger(__name__)
+
+# File types the backend upload routes accept
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt', '.md', '.html', '.htm', '.png', '.jpg', '.jpeg', '.webp', '.gif'}
+
+
+def is_hidden(name: str) -> bool:
+    """Hidden entries: editor swap files, partial downloads, dot directories"""
+    return name.startswith('.')
+
+
+def is_candidate(name: str) -> bool:
+    """Files the backend can ingest; anything else would only be rejected"""
+    return not is_hidden(name) and os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def _list_dir(directory: str) -> Tuple[Dict[str, Signature], List[str]]:
+    files: Dict[str, Signature] = {}
+    subdirs: List[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if is_hidden(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif is_candidate(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # Removed while scanning
+                    continue
+    except OSError as e:
+        logger.warning(f"Cannot scan {directory}: {str(e)}")
+    return files, subdirs
+
+
+async def scan_tree(root: str, recursive: bool, concurrency: int) -> Dict[str, Signature]:
+    """Return {path: (size, mtime_ns)} for the files under ``root``
+
+    Directories are listed in parallel threads, so large trees on slow or
+    network storage are scanned in a fraction of the sequential time.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+    found: Dict[str, Signature] = {}
+
+    async def visit(directory: str):
+        async with slots:
+            files, subdirs = await asyncio.to_thread(_list_dir, directory)
+        found.update(files)
+        if recursive and subdirs:
+            await asyncio.gather(*(visit(subdir) for subdir in subdirs))
+
+    await visit(root)
+    return found
@@ -3,10 +3,34 @@
 import { useState, useCallback } from 'react'
 import { api } from '@/lib/api'
 import Link from 'next/link'
+import type { JobResponse } from '@/types/api'
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8100'
 
 type IngestMethod = 'url' | 'text' | 'file'
 type IngestResult = { success: boolean; document_id: string; chunks_count: number } | null
 
+// Give up on an ingestion job after this long
+const JOB_WAIT_MS = 10 * 60 * 1000
+
+// Wait for a background ingestion job to finish
+async function waitForJob(jobId: string, onProgress: (job: JobResponse) => void): Promise<JobResponse> {
+  const deadline = Date.now() + JOB_WAIT_MS
+  while (Date.now() < deadline) {
+    const response = await fetch(`${API_URL}/api/v1/jobs/${jobId}`)
+    if (!response.ok) {
+      throw new Error(`Could not check ingestion job (${response.status})`)
+    }
+    const job: JobResponse = await response.json()
+    if (job.status === 'succeeded' || job.status === 'failed') {
+      return job
+    }
+    onProgress(job)
+    await new Promise(resolve => setTimeout(resolve, 1000))
+  }
+  throw new Error('Ingestion is taking too long; check the backend')
+}
+
 const SUPPORTED_FILE_TYPES = [
   { ext: '.pdf', label: 'PDF' },
   { ext: '.docx', label: 'Word' },
@@ -24,6 +48,7 @@ export default function IngestPage() {
   const [isLoading, setIsLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [result, setResult] = useState<IngestResult>(null)
+  const [progress, setProgress] = useState<string | null>(null)
 
   // URL state
   const [url, setUrl] = useState('')
@@ -71,6 +96,7 @@ export default function IngestPage() {
     setIsLoading(true)
     setError(null)
     setResult(null)
+    setProgress(null)
 
     try {
       let response
@@ -97,10 +123,17 @@ export default function IngestPage() {
         throw new Error('Invalid method')
       }
 
+      const job = await waitForJob(response.job_id, (current) => {
+        setProgress(current.progress?.stage || current.status)
+      })
+      if (job.status === 'failed' || !job.result) {
+        throw new Error(job.error || 'Ingestion failed')
+      }
+
       setResult({
         success: true,
-        document_id: response.document_id,
-        chunks_count: response.chunks_count
+        document_id: job.result.document_id,
+        chunks_count: job.result.chunks_count
       })
 
       // Reset form on success
@@ -113,6 +146,7 @@ export default function IngestPage() {
       setError(errorMessage)
     } finally {
       setIsLoading(false)
+      setProgress(null)
     }
   }
 
@@ -312,7 +346,7 @@ export default function IngestPage() {
               {isLoading ? (
                 <span className="flex items-center gap-2">
                   <span className="inline-block animate-spin rounded-full h-4 w-4 border-b-2 border-white"></span>
-                  Processing...
+                  {progress ? `Processing (${progress})...` : 'Processing...'}
                 </span>
               ) : (
                 'Add to Knowledge Base'
@@ -27,11 +27,25 @@ export interface IngestRequest {
   metadata?: Record<string, any>
 }
 
-export interface IngestResponse {
+export interface IngestResult {
   document_id: string
   chunks_count: number
-  point_ids: string[]
   status: string
+  title?: string
+}
+
+// /ingest and /upload queue a job; poll /jobs/{job_id} until it finishes
+export interface JobResponse {
+  job_id: string
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: Record<string, any>
+  result?: IngestResult | null
+  error?: string | null
+  attempts: number
+  created_at: string
+  started_at?: string | null
+  finished_at?: string | null
 }
 
 export interface DocumentInfo {